@@ -0,0 +1,67 @@
+"""
+Recall / latency benchmark: IVF index vs exact search over a synthetic gallery.
+
+Usage:
+    python benchmarks/bench_ann.py --size 100000 --nlist 1024 --nprobe 4 8 16 32 64
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+from src.ann_index import IVFIndex
+from synthetic import synthetic_gallery, synthetic_queries
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000, help='Number of enrolled identities')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=1)
+    parser.add_argument('--nlist', type=int, default=1024)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument('--json', type=str, help='Optional path to write results as JSON')
+    args = parser.parse_args()
+
+    gallery = synthetic_gallery(args.size)
+    queries = synthetic_queries(gallery, args.queries)
+
+    # Exact baseline
+    start = time.perf_counter()
+    exact = []
+    for q in queries:
+        dists = torch.cdist(q.unsqueeze(0), gallery).squeeze(0)
+        exact.append(set(torch.topk(dists, args.k, largest=False).indices.tolist()))
+    exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    index = IVFIndex(nlist=args.nlist)
+    start = time.perf_counter()
+    index.train(gallery)
+    index.add(gallery)
+    build_s = time.perf_counter() - start
+
+    print(f"Gallery: {args.size}  nlist: {index.nlist}  build: {build_s:.1f}s")
+    print(f"{'mode':>10} {'recall@' + str(args.k):>10} {'ms/query':>10} {'speedup':>8}")
+    print(f"{'exact':>10} {1.0:>10.3f} {exact_ms:>10.3f} {1.0:>8.1f}")
+
+    results = {'size': args.size, 'nlist': index.nlist, 'k': args.k, 'build_s': build_s,
+               'exact_ms': exact_ms, 'ivf': []}
+    for nprobe in args.nprobe:
+        hits = 0
+        start = time.perf_counter()
+        for q, truth in zip(queries, exact):
+            ids, _ = index.search(q, gallery, k=args.k, nprobe=nprobe)
+            hits += len(truth & set(ids.tolist()))
+        ms = (time.perf_counter() - start) * 1000 / args.queries
+        recall = hits / (args.queries * args.k)
+        print(f"{'nprobe=' + str(nprobe):>10} {recall:>10.3f} {ms:>10.3f} {exact_ms / ms:>8.1f}")
+        results['ivf'].append({'nprobe': nprobe, 'recall': recall, 'ms_per_query': ms})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
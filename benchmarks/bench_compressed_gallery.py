@@ -0,0 +1,67 @@
+"""
+Recall / latency / memory benchmark: float16 and int8 galleries (with and without
+float32 re-ranking) vs exact float32 search over a synthetic gallery.
+
+Usage:
+    python benchmarks/bench_compressed_gallery.py --size 100000 --rerank 0 8 32
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+from src.compressed_gallery import CompressedGallery, DTYPES
+from synthetic import synthetic_gallery, synthetic_queries
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000, help='Number of enrolled identities')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=1)
+    parser.add_argument('--rerank', type=int, nargs='+', default=[0, 8, 32])
+    parser.add_argument('--json', type=str, help='Optional path to write results as JSON')
+    args = parser.parse_args()
+
+    gallery = synthetic_gallery(args.size)
+    queries = synthetic_queries(gallery, args.queries)
+
+    # Exact baseline (same per-query cdist + topk as FaceRecognizer.search)
+    start = time.perf_counter()
+    exact = []
+    for q in queries:
+        dists = torch.cdist(q.unsqueeze(0), gallery).squeeze(0)
+        exact.append(set(torch.topk(dists, args.k, largest=False).indices.tolist()))
+    exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+    exact_mb = gallery.numel() * 4 / 2**20
+
+    print(f"Gallery: {args.size}")
+    print(f"{'mode':>16} {'recall@' + str(args.k):>10} {'ms/query':>10} {'speedup':>8} {'MB':>9}")
+    print(f"{'float32':>16} {1.0:>10.3f} {exact_ms:>10.3f} {1.0:>8.1f} {exact_mb:>9.1f}")
+
+    results = {'size': args.size, 'k': args.k, 'exact_ms': exact_ms, 'exact_mb': exact_mb, 'compressed': []}
+    for dtype in DTYPES:
+        compressed = CompressedGallery(dtype)
+        compressed.add(gallery)
+        mb = compressed.nbytes() / 2**20
+        for rerank in args.rerank:
+            hits = 0
+            start = time.perf_counter()
+            for q, truth in zip(queries, exact):
+                ids, _ = compressed.search(q.unsqueeze(0), gallery, k=args.k, rerank=rerank)
+                hits += len(truth & set(ids[0].tolist()))
+            ms = (time.perf_counter() - start) * 1000 / args.queries
+            recall = hits / (args.queries * args.k)
+            label = f"{dtype} rr={rerank}"
+            print(f"{label:>16} {recall:>10.3f} {ms:>10.3f} {exact_ms / ms:>8.1f} {mb:>9.1f}")
+            results['compressed'].append({'dtype': dtype, 'rerank': rerank, 'recall': recall,
+                                          'ms_per_query': ms, 'mb': mb})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
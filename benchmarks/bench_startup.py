@@ -0,0 +1,77 @@
+"""
+Startup-time benchmark for AttendanceManager state recovery on a synthetic multi-year log.
+
+Compares:
+  legacy    - pandas read of the attendance table + one mask per unique name
+  replay    - single pass over the whole punch journal (no snapshot)
+  snapshot  - snapshot + replay of only the punches appended since
+
+Usage:
+    python benchmarks/bench_startup.py --users 500 --years 3 --tail 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.attendance import AttendanceManager
+from src.journal import PunchJournal
+from synthetic import write_synthetic_journal
+
+def legacy_load(log_path):
+    """The previous load_logs(): O(users x rows)."""
+    import pandas as pd
+    state = {}
+    df = pd.read_csv(log_path)
+    for name in df['Name'].unique():
+        last_row = df[df['Name'] == name].iloc[-1]
+        punch_out = last_row['Punch Out Time']
+        state[name] = "OUT" if (pd.notna(punch_out) and str(punch_out).strip()) else "IN"
+    return state
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--tail', type=int, default=200, help='Punches appended after the snapshot')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_path = os.path.join(tmp, 'journal.csv')
+        log_path = os.path.join(tmp, 'attendance_log.csv')
+        snapshot_path = os.path.join(tmp, 'state.json')
+
+        events = write_synthetic_journal(journal_path, args.users, args.years)
+        rows = PunchJournal(journal_path).materialize(log_path)
+        print(f"Synthetic log: {args.users} users, {args.years} years, {events} punches, {rows} table rows")
+
+        try:
+            legacy_s, _ = timed(lambda: legacy_load(log_path))
+            print(f"legacy   : {legacy_s:8.3f}s")
+        except ImportError:
+            print("legacy   : skipped (pandas not installed)")
+
+        replay_s, manager = timed(lambda: AttendanceManager(journal_path, log_path, snapshot_path))
+        print(f"replay   : {replay_s:8.3f}s  ({len(manager.user_state)} users restored)")
+
+        # load_logs() left a snapshot behind; append a tail and restart
+        journal = PunchJournal(journal_path, fsync=False)
+        now = datetime.now()
+        for i in range(args.tail):
+            journal.append(f"user_{i % args.users:05d}", now, "PUNCH IN")
+        journal.close()
+
+        snapshot_s, manager = timed(lambda: AttendanceManager(journal_path, log_path, snapshot_path))
+        print(f"snapshot : {snapshot_s:8.3f}s  (replayed {args.tail} punches)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Load test for the local recognition API (python main.py --mode api).
+Concurrent clients POST one face image each, back to back; reports throughput
+and latency percentiles.
+
+Usage:
+    python benchmarks/load_test_api.py --concurrency 16 --requests 2000
+    python benchmarks/load_test_api.py --image face.jpg --concurrency 1 4 16 64
+    python benchmarks/load_test_api.py --image frame.jpg --detect
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+def synthetic_crop_jpeg():
+    import cv2
+    from synthetic import synthetic_frame
+    ok, data = cv2.imencode('.jpg', synthetic_frame(160, 160))
+    return data.tobytes()
+
+def run_load(url, body, concurrency, total):
+    """Returns (latencies_ms, errors, wall_seconds) for `total` requests over `concurrency` clients."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client():
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/octet-stream'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    json.loads(response.read())
+                ms = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(ms)
+            except (urllib.error.URLError, OSError, ValueError):
+                with lock:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), errors[0], time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', type=str, default='http://127.0.0.1:8765')
+    parser.add_argument('--image', type=str, help='JPEG/PNG to send (default: synthetic 160x160 crop)')
+    parser.add_argument('--detect', action='store_true', help='Send as a full frame (/identify?detect=1)')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per concurrency level')
+    parser.add_argument('--json', type=str, help='Optional path to write results as JSON')
+    args = parser.parse_args()
+
+    body = Path(args.image).read_bytes() if args.image else synthetic_crop_jpeg()
+    url = args.url.rstrip('/') + '/identify' + ('?detect=1' if args.detect else '')
+
+    # One request first so model warm-up is not measured
+    run_load(url, body, 1, 1)
+
+    print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    results = []
+    for concurrency in args.concurrency:
+        latencies, errors, seconds = run_load(url, body, concurrency, args.requests)
+        row = {'concurrency': concurrency, 'requests': args.requests, 'errors': errors,
+               'throughput': len(latencies) / seconds if seconds > 0 else 0.0,
+               'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+               'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None}
+        results.append(row)
+        print(f"{concurrency:>8} {row['throughput']:>9.1f} {row['p50_ms'] or 0:>9.2f} {row['p99_ms'] or 0:>9.2f} {errors:>7}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Parity check: crop-local alignment (FaceRecognizer.align_face) vs the previous
+full-frame rotate -> crop -> resize path.
+
+Reports pixel difference of the aligned crops and, with --embed, the FaceNet
+embedding distance between both paths (should be far below RECOGNITION_THRESHOLD).
+
+Usage:
+    python benchmarks/parity_alignment.py --image data/sample.jpg --embed
+    python benchmarks/parity_alignment.py --trials 200 --width 1920 --height 1080
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+from synthetic import synthetic_face, synthetic_frame
+
+def legacy_align(frame, face_data):
+    """The previous implementation: rotate the whole frame, crop, then resize."""
+    box = face_data['facial_area']
+    left_eye = face_data['landmarks']['left_eye']
+    right_eye = face_data['landmarks']['right_eye']
+    angle = np.degrees(np.arctan2(right_eye[1] - left_eye[1], right_eye[0] - left_eye[0]))
+    center = (int((box[0] + box[2]) / 2), int((box[1] + box[3]) / 2))
+
+    M = cv2.getRotationMatrix2D(center, angle, 1.0)
+    rotated = cv2.warpAffine(frame, M, (frame.shape[1], frame.shape[0]))
+    h, w = rotated.shape[:2]
+    crop = rotated[max(0, box[1]):min(h, box[3]), max(0, box[0]):min(w, box[2])]
+    if crop.size == 0:
+        return None
+    return cv2.resize(crop, (160, 160))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--image', type=str, help='Real frame to test on (faces found with RetinaFace)')
+    parser.add_argument('--trials', type=int, default=100, help='Synthetic faces when no --image is given')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--embed', action='store_true', help='Also compare FaceNet embeddings')
+    args = parser.parse_args()
+
+    from src.recognizer import FaceRecognizer
+    recognizer = FaceRecognizer.__new__(FaceRecognizer)  # align_face needs no model
+    if args.embed:
+        recognizer = FaceRecognizer()
+
+    rng = np.random.default_rng(0)
+    if args.image:
+        from src.detector import FaceDetector
+        frame = cv2.imread(args.image)
+        faces = FaceDetector().detect(frame)
+        cases = [(frame, f) for f in faces.values()] if isinstance(faces, dict) else []
+    else:
+        frame = synthetic_frame(args.width, args.height)
+        cases = [(frame, synthetic_face(rng, args.width, args.height)) for _ in range(args.trials)]
+
+    pixel_diffs, emb_dists = [], []
+    legacy_s = local_s = 0.0
+    for frame, face_data in cases:
+        start = time.perf_counter()
+        old = legacy_align(frame, face_data)
+        legacy_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = recognizer.align_face(frame, face_data)
+        local_s += time.perf_counter() - start
+
+        if old is None or new is None:
+            continue
+        pixel_diffs.append(np.abs(old.astype(np.float32) - new.astype(np.float32)).mean())
+        if args.embed:
+            embs = recognizer.embed_crops([old, new])
+            emb_dists.append((embs[0] - embs[1]).norm().item())
+
+    if not pixel_diffs:
+        print("No comparable faces.")
+        return
+
+    print(f"Faces compared: {len(pixel_diffs)}")
+    print(f"Mean abs pixel diff: {np.mean(pixel_diffs):.3f} (max {np.max(pixel_diffs):.3f}) on 0-255 scale")
+    print(f"Align time: legacy {legacy_s * 1000 / len(cases):.3f} ms  crop-local {local_s * 1000 / len(cases):.3f} ms")
+    if emb_dists:
+        print(f"Embedding distance: mean {np.mean(emb_dists):.4f}  max {np.max(emb_dists):.4f}")
+
+if __name__ == "__main__":
+    main()
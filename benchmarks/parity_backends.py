@@ -0,0 +1,75 @@
+"""
+Accuracy / speed parity of FaceNet inference backends against eager float32.
+
+For every backend the same aligned crops are embedded; the script reports the L2
+distance to the eager embedding (compare with RECOGNITION_THRESHOLD), how often the
+nearest enrolled identity changes, and the time per batch. Backends that cannot be
+loaded here are listed as unavailable instead of being timed as eager.
+
+Usage:
+    python benchmarks/parity_backends.py --crops 64 --batch 8
+    python benchmarks/parity_backends.py --images path/to/aligned_faces --backends eager torchscript onnx
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+import torch
+from core.config import RECOGNITION_THRESHOLD
+from src.backends import BACKENDS
+from src.recognizer import FaceRecognizer
+
+def load_crops(images, count, seed=0):
+    """Aligned 160x160 crops from a folder, or smooth random textures."""
+    if images:
+        paths = sorted(p for p in Path(images).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+        return [cv2.resize(cv2.imread(str(p)), (160, 160)) for p in paths[:count]]
+    rng = np.random.default_rng(seed)
+    return [cv2.GaussianBlur(rng.integers(0, 256, (160, 160, 3), dtype=np.uint8), (0, 0), 2) for _ in range(count)]
+
+def embed_all(recognizer, crops, batch):
+    out = []
+    start = time.perf_counter()
+    for i in range(0, len(crops), batch):
+        out.append(recognizer.embed_crops(crops[i:i + batch]))
+    elapsed = time.perf_counter() - start
+    return torch.cat(out), elapsed * 1000 / max(1, (len(crops) + batch - 1) // batch)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--images', type=str, help='Folder of aligned face crops (default: synthetic)')
+    parser.add_argument('--crops', type=int, default=64)
+    parser.add_argument('--batch', type=int, default=8)
+    args = parser.parse_args()
+
+    crops = load_crops(args.images, args.crops)
+    reference = FaceRecognizer(backend='eager')
+    reference.warmup()
+    ref_embs, ref_ms = embed_all(reference, crops, args.batch)
+
+    # Identity agreement: nearest enrolled user (or crop index when the DB is empty)
+    gallery = reference.gallery if len(reference.gallery_names) else ref_embs
+    ref_ids = torch.cdist(ref_embs, gallery).argmin(dim=1)
+
+    print(f"Crops: {len(crops)}  batch: {args.batch}  threshold: {RECOGNITION_THRESHOLD}")
+    print(f"{'backend':>12} {'ms/batch':>10} {'speedup':>8} {'mean dist':>10} {'max dist':>10} {'id agree':>9}")
+    for name in args.backends:
+        recognizer = reference if name == 'eager' else FaceRecognizer(backend=name)
+        if recognizer.backend != name:
+            # Fell back to eager: its numbers would read as a free, lossless backend
+            print(f"{name:>12} {'unavailable (fell back to ' + recognizer.backend + ')':>50}")
+            continue
+        recognizer.warmup()
+        embs, ms = embed_all(recognizer, crops, args.batch)
+        dists = (embs - ref_embs).norm(dim=1)
+        agree = (torch.cdist(embs, gallery).argmin(dim=1) == ref_ids).float().mean().item()
+        print(f"{name:>12} {ms:>10.2f} {ref_ms / ms:>8.2f} {dists.mean().item():>10.5f} "
+              f"{dists.max().item():>10.5f} {agree:>9.3f}")
+
+if __name__ == "__main__":
+    main()
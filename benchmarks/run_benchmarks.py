@@ -0,0 +1,219 @@
+"""
+Stage-level benchmark suite. Needs no camera: frames are synthetic, or loaded from
+a folder of recorded frames with --frames.
+
+Stages timed separately:
+  detect          FaceDetector.detect            sweep: frame resolution
+  verify_intent   FaceDetector.verify_intent     sweep: faces per frame
+  get_embedding   FaceRecognizer.get_embeddings  sweep: faces per frame, frame resolution
+  identify        FaceRecognizer.identify        sweep: gallery size (synthetic embeddings), gallery dtype
+  process_punch   AttendanceManager.process_punch sweep: existing log size
+
+Results are written as JSON. Pass --compare with an earlier result file to flag regressions.
+
+Usage:
+    python benchmarks/run_benchmarks.py --out results.json
+    python benchmarks/run_benchmarks.py --stages identify --gallery-sizes 10 1000 100000 1000000
+    python benchmarks/run_benchmarks.py --stages identify --gallery-dtypes float32 int8
+    python benchmarks/run_benchmarks.py --out new.json --compare baseline.json --tolerance 1.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from synthetic import centred_face, synthetic_frame, synthetic_gallery, synthetic_queries, write_synthetic_journal
+
+STAGES = ('detect', 'verify_intent', 'get_embedding', 'identify', 'process_punch')
+
+def measure(fn, repeat, warmup=1):
+    """Runs fn() `warmup` + `repeat` times; returns latency stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {'mean': float(samples.mean()), 'p50': float(np.percentile(samples, 50)),
+            'p95': float(np.percentile(samples, 95)), 'min': float(samples.min()), 'n': repeat}
+
+def parse_resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+def load_frames(folder, resolution):
+    """Recorded frames resized to `resolution`, or one synthetic frame."""
+    import cv2
+    if not folder:
+        return [synthetic_frame(*resolution)]
+    paths = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    return [cv2.resize(cv2.imread(str(p)), resolution) for p in paths]
+
+def faces_in_row(width, height, count):
+    """`count` frontal faces side by side across the frame centre."""
+    size = max(80, min(width // (count + 1), height // 3))
+    faces = []
+    for i in range(count):
+        face = centred_face(width, height, size)
+        shift = int((i - (count - 1) / 2) * size * 1.1)
+        face['facial_area'] = [face['facial_area'][0] + shift, face['facial_area'][1],
+                               face['facial_area'][2] + shift, face['facial_area'][3]]
+        for point in face['landmarks'].values():
+            point[0] += shift
+        faces.append(face)
+    return faces
+
+def bench_detect(args, results):
+    from src.detector import FaceDetector
+    detector = FaceDetector()
+    detector.warmup()
+    for resolution in args.resolutions:
+        frames = load_frames(args.frames, resolution)
+        state = {'i': 0}
+        def run():
+            detector.detect(frames[state['i'] % len(frames)])
+            state['i'] += 1
+        results.append({'stage': 'detect', 'params': {'resolution': f"{resolution[0]}x{resolution[1]}"},
+                        'ms': measure(run, args.repeat)})
+
+def bench_verify_intent(args, results):
+    from src.detector import FaceDetector
+    detector = FaceDetector()
+    width, height = args.resolutions[0]
+    for count in args.faces:
+        faces = faces_in_row(width, height, count)
+        def run():
+            for face in faces:
+                detector.verify_intent(face, width, height)
+        results.append({'stage': 'verify_intent', 'params': {'faces': count},
+                        'ms': measure(run, args.repeat * 10)})
+
+def bench_get_embedding(args, results):
+    from src.recognizer import FaceRecognizer
+    recognizer = FaceRecognizer()
+    recognizer.embedding_cache = None  # Same frame every call: the cache would turn this into a lookup
+    recognizer.warmup()
+    for resolution in args.resolutions:
+        frame = load_frames(args.frames, resolution)[0]
+        for count in args.faces:
+            faces = faces_in_row(resolution[0], resolution[1], count)
+            results.append({'stage': 'get_embedding',
+                            'params': {'resolution': f"{resolution[0]}x{resolution[1]}", 'faces': count},
+                            'ms': measure(lambda: recognizer.get_embeddings(frame, faces), args.repeat)})
+
+def bench_identify(args, results):
+    from src.recognizer import FaceRecognizer
+    for size in args.gallery_sizes:
+        gallery = synthetic_gallery(size)
+        names = [f"user_{i}" for i in range(size)]
+        queries = synthetic_queries(gallery, 64)
+        for dtype in args.gallery_dtypes:
+            recognizer = FaceRecognizer.from_gallery(gallery, names, dtype)  # No FaceNet weights
+            state = {'i': 0}
+            def run():
+                recognizer.identify(queries[state['i'] % len(queries)].unsqueeze(0))
+                state['i'] += 1
+            results.append({'stage': 'identify', 'params': {'gallery': size, 'dtype': dtype},
+                            'ms': measure(run, args.repeat)})
+            del recognizer
+        del gallery
+
+def bench_process_punch(args, results):
+    from src.attendance import AttendanceManager
+    for log_size in args.log_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal_path = os.path.join(tmp, 'journal.csv')
+            write_synthetic_journal(journal_path, users=500, years=100, max_events=log_size)
+            # Synchronous writes: with the background writer only Queue.put would be timed
+            manager = AttendanceManager(journal_path, os.path.join(tmp, 'log.csv'), os.path.join(tmp, 'state.json'),
+                                        async_writes=False, backend='journal')
+            state = {'i': 0, 'now': datetime.now()}
+            def run():
+                # A new name every call, so each one is a real write (no cooldown short-circuit)
+                state['i'] += 1
+                manager.process_punch(f"bench_{state['i']}", state['now'] + timedelta(seconds=state['i']))
+            with contextlib.redirect_stdout(io.StringIO()):  # Keep the "Logged: ..." prints out of the timing
+                ms = measure(run, args.repeat)
+            results.append({'stage': 'process_punch', 'params': {'log_events': log_size}, 'ms': ms})
+            manager.journal.close()
+
+def metadata():
+    meta = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+    try:
+        meta['git_commit'] = subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True,
+                                                     stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        meta['git_commit'] = None
+    try:
+        import torch
+        meta['torch'] = torch.__version__
+        meta['torch_threads'] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return meta
+
+def compare(results, baseline_path, tolerance):
+    """Prints mean-latency ratios against a baseline file. Returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], json.dumps(r['params'], sort_keys=True)): r for r in json.load(f)['results']}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (tolerance x{tolerance}):")
+    for r in results:
+        old = baseline.get((r['stage'], json.dumps(r['params'], sort_keys=True)))
+        if old is None:
+            continue
+        ratio = r['ms']['mean'] / old['ms']['mean'] if old['ms']['mean'] > 0 else float('inf')
+        flag = "REGRESSION" if ratio > tolerance else ""
+        regressions += bool(flag)
+        print(f"  {r['stage']:<14} {json.dumps(r['params']):<40} x{ratio:5.2f} {flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--frames', type=str, help='Folder of recorded frames (default: synthetic)')
+    parser.add_argument('--resolutions', nargs='+', type=parse_resolution,
+                        default=[(640, 480), (1280, 720), (1920, 1080)])
+    parser.add_argument('--faces', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--gallery-sizes', nargs='+', type=int, default=[10, 100, 1000, 10000, 100000, 1000000])
+    parser.add_argument('--gallery-dtypes', nargs='+', default=['float32', 'float16', 'int8'],
+                        choices=['float32', 'float16', 'int8'])
+    parser.add_argument('--log-sizes', nargs='+', type=int, default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--out', type=str, default='bench_results.json')
+    parser.add_argument('--compare', type=str, help='Earlier results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.2, help='Mean-latency ratio counted as a regression')
+    args = parser.parse_args()
+
+    runners = {'detect': bench_detect, 'verify_intent': bench_verify_intent, 'get_embedding': bench_get_embedding,
+               'identify': bench_identify, 'process_punch': bench_process_punch}
+    results = []
+    for stage in args.stages:
+        print(f"Benchmarking {stage}...")
+        before = len(results)
+        runners[stage](args, results)
+        for r in results[before:]:
+            print(f"  {json.dumps(r['params']):<40} mean {r['ms']['mean']:9.3f} ms  p95 {r['ms']['p95']:9.3f} ms")
+
+    with open(args.out, 'w') as f:
+        json.dump({'meta': metadata(), 'results': results}, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic inputs shared by the benchmark scripts (no camera or recorded data needed).
+Heavy imports are local so attendance-only benchmarks run without torch / OpenCV.
+"""
+import csv
+from datetime import datetime, timedelta
+
+def synthetic_gallery(size, dim=512, seed=0):
+    """L2-normalised random identities, like FaceNet embeddings."""
+    import torch
+    gen = torch.Generator().manual_seed(seed)
+    gallery = torch.randn(size, dim, generator=gen)
+    return torch.nn.functional.normalize(gallery, dim=1)
+
+def synthetic_queries(gallery, count, noise=0.35, seed=1):
+    """Noisy re-captures of random enrolled identities."""
+    import torch
+    gen = torch.Generator().manual_seed(seed)
+    ids = torch.randint(0, gallery.shape[0], (count,), generator=gen)
+    queries = gallery[ids] + noise * torch.randn(count, gallery.shape[1], generator=gen) / gallery.shape[1] ** 0.5
+    return torch.nn.functional.normalize(queries, dim=1)
+
+def synthetic_frame(width, height, seed=0):
+    """Smooth random texture, so interpolation and hashing costs are representative."""
+    import cv2
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+
+def synthetic_face(rng, width, height, min_size=80):
+    """Random plausible RetinaFace entry: box, tilted eye line, nose, mouth."""
+    size = int(rng.integers(min_size, max(min_size + 1, min(width, height) // 2)))
+    x1 = int(rng.integers(0, width - size))
+    y1 = int(rng.integers(0, height - size))
+    box = [x1, y1, x1 + size, y1 + int(size * rng.uniform(1.0, 1.3))]
+    tilt = rng.uniform(-0.3, 0.3) * size
+    landmarks = {
+        'left_eye': [x1 + 0.3 * size, y1 + 0.4 * size],
+        'right_eye': [x1 + 0.7 * size, y1 + 0.4 * size + tilt],
+        'nose': [x1 + 0.5 * size, y1 + 0.6 * size + tilt / 2],
+        'mouth_left': [x1 + 0.35 * size, y1 + 0.8 * size],
+        'mouth_right': [x1 + 0.65 * size, y1 + 0.8 * size + tilt],
+    }
+    return {'facial_area': box, 'landmarks': landmarks, 'score': 0.99}
+
+def centred_face(width, height, size=None):
+    """A frontal face in the middle of the frame that passes every intent check."""
+    size = size or max(100, width // 5)
+    x1, y1 = width // 2 - size // 2, height // 2 - size // 2
+    return {
+        'facial_area': [x1, y1, x1 + size, y1 + size],
+        'landmarks': {
+            'left_eye': [x1 + 0.3 * size, y1 + 0.4 * size],
+            'right_eye': [x1 + 0.7 * size, y1 + 0.4 * size],
+            'nose': [x1 + 0.5 * size, y1 + 0.6 * size],
+            'mouth_left': [x1 + 0.35 * size, y1 + 0.8 * size],
+            'mouth_right': [x1 + 0.65 * size, y1 + 0.8 * size],
+        },
+        'score': 0.99,
+    }
+
+def write_synthetic_journal(path, users, years, start=datetime(2020, 1, 1), max_events=None):
+    """One IN and one OUT per user per working day. Returns the event count."""
+    from src.journal import JOURNAL_COLUMNS
+
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(JOURNAL_COLUMNS)
+        for day in range(int(years * 365)):
+            date = start + timedelta(days=day)
+            if date.weekday() >= 5:
+                continue
+            for u in range(users):
+                if max_events is not None and count >= max_events:
+                    return count
+                name = f"user_{u:05d}"
+                writer.writerow([(date + timedelta(hours=9, minutes=u % 60)).isoformat(), name, "PUNCH IN"])
+                writer.writerow([(date + timedelta(hours=17, minutes=u % 60)).isoformat(), name, "PUNCH OUT"])
+                count += 2
+    return count
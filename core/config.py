@@ -3,8 +3,16 @@ import os
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
-DB_PATH = os.path.join(DATA_DIR, "face_db.pt")
+DB_PATH = os.path.join(DATA_DIR, "face_db.pt")  # Legacy pickled DB, migrated to the matrix on first load
+DB_MATRIX_PATH = os.path.join(DATA_DIR, "face_db.f32")  # float32 (N, 512) embeddings, memory-mapped, append-only
+DB_INDEX_PATH = os.path.join(DATA_DIR, "face_db.index.tsv")  # key/name sidecar, row-aligned with the matrix
 LOG_PATH = os.path.join(DATA_DIR, "attendance_log.csv")
+JOURNAL_PATH = os.path.join(DATA_DIR, "attendance_journal.csv")
+STATE_SNAPSHOT_PATH = os.path.join(DATA_DIR, "attendance_state.json")
+ATTENDANCE_DB_PATH = os.path.join(DATA_DIR, "attendance.db")  # SQLite store (ATTENDANCE_BACKEND = 'sqlite')
+ANN_INDEX_PATH = os.path.join(DATA_DIR, "face_db.ivf")  # IVF index (.json header + raw buffers)
+GALLERY_COMPRESSED_PATH = os.path.join(DATA_DIR, "face_db.compressed")  # float16 / int8 gallery codes (.json header + raw buffers)
+MODEL_CACHE_DIR = os.path.join(DATA_DIR, "models")  # Exported FaceNet backends
 
 # Create data dir if missing
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -14,17 +22,52 @@ DEVICE_ID = 0 # Camera Index
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
 
+# Run-mode Pipeline (capture -> detect -> recognize -> render)
+DETECT_WORKERS = 1          # Detection threads
+RECOGNIZE_WORKERS = 1       # Recognition / punch threads
+PIPELINE_QUEUE_SIZE = 2     # Max frames queued per stage (oldest dropped when full)
+
+# Service mode (several cameras sharing one detector / recognizer)
+BATCH_MAX_SIZE = 16         # Max face crops per batched FaceNet pass across streams
+BATCH_MAX_WAIT_MS = 10      # Max time the first queued crop waits for others to join its batch
+
+# Local recognition API (api mode)
+API_HOST = "127.0.0.1"      # Loopback only: the API has no authentication
+API_PORT = 8765
+API_MAX_BODY = 8 * 1024 * 1024  # Bytes per uploaded image
+
+# Bulk enrollment (enroll mode)
+ENROLL_WORKERS = 4          # Detection / alignment processes (0 = in-process)
+ENROLL_BATCH_SIZE = 32      # Face crops per FaceNet forward pass
+
+# Instrumentation (per-stage latency histograms, counters, FPS)
+METRICS_ENABLED = False     # When False all instrumentation calls are no-ops
+METRICS_OVERLAY = False     # Draw live stats on the video window
+METRICS_DUMP_PATH = os.path.join(DATA_DIR, "metrics.prom")  # Prometheus text (or JSON if *.json)
+METRICS_DUMP_INTERVAL = 10  # Seconds between dumps
+
 # Detection & Intent
 RETINA_CONFIDENCE = 0.90
 MIN_FACE_WIDTH = 80         # Pixels (Too far check)
 ROI_CENTER_PCT = 0.40       # Center 40% box
 GAZE_THRESHOLD_LOW = 0.35   # Head turn limit
 GAZE_THRESHOLD_HIGH = 0.65  # Head turn limit
+DETECT_ROI_ONLY = False     # Run RetinaFace on the ROI crop only (boxes mapped back to full frame)
+DETECT_ROI_MARGIN = 0.10    # Extra crop around the ROI (fraction of frame size) for faces straddling its edge
+DETECT_SCALE = 1.0          # Downscale factor for the detector input in ROI mode (e.g. 0.5)
+
+# Tracking (skip detection / recognition between frames)
+DETECT_EVERY_N_FRAMES = 5   # Full RetinaFace pass every N frames (every frame while no tracks)
+TRACK_IOU_THRESHOLD = 0.3   # Min IoU to match a detection to an existing track
+TRACK_MAX_MISSED = 2        # Detection rounds a track may go unmatched before it is dropped
+REVERIFY_SECONDS = 2.0      # Re-run recognition on an identified track at most this often
 
 # Liveness Detection (Spoof Prevention)
-LIVENESS_ENABLED = True
+LIVENESS_ENABLED = False  # Per-track challenge before a punch (run / serve / process modes)
 LIVENESS_CHALLENGE_TIMEOUT = 5  # seconds to complete challenge
 LIVENESS_CHALLENGES = ['blink', 'look_left', 'look_right']  # Available challenges
+LIVENESS_WINDOW = 16  # Samples kept per tracked face (ring buffer length)
+LIVENESS_IDLE_SECONDS = 5.0  # Forget a track's liveness state after this long unseen
 
 # Blink Detection
 BLINK_THRESHOLD = 0.25  # Eye aspect ratio threshold
@@ -33,15 +76,53 @@ BLINK_FRAMES = 3  # Frames to confirm blink
 # Head Pose Detection (for look left/right)
 HEAD_POSE_THRESHOLD = 0.5  # Ratio threshold for left/right gaze
 
+# Quality gate (between intent and FaceNet; rejected crops skip inference)
+QUALITY_ENABLED = False         # Tune the thresholds below for your camera before enabling
+QUALITY_MIN_SHARPNESS = 15.0    # Laplacian variance of the 96x96 grey crop (lower = blurrier)
+QUALITY_MAX_BRIGHT = 0.40       # Max fraction of near-white pixels (>= 250)
+QUALITY_MAX_DARK = 0.40         # Max fraction of near-black pixels (<= 5)
+QUALITY_MAX_ASYMMETRY = 0.40    # Max left/right landmark distance imbalance around the nose (0 = symmetric)
+
 # Recognition
 RECOGNITION_THRESHOLD = 0.60 # Lower = stricter
+GALLERY_DTYPE = 'float32'   # First-pass search precision: float32 (exact), float16 or int8
+GALLERY_RERANK = 32         # Candidates re-ranked in float32 after a float16 / int8 pass (0 = none)
+FACENET_BACKEND = 'eager'    # 'eager', 'torchscript', 'int8' (dynamic quantization), 'onnx' (needs onnxruntime)
+
+# Embedding Cache (skip FaceNet for near-identical crops)
+EMBED_CACHE_ENABLED = False  # Reuse embeddings of near-duplicate aligned crops
+EMBED_CACHE_SIZE = 256       # Max cached crops (LRU eviction)
+EMBED_CACHE_TTL = 1.0        # Seconds a cached embedding stays valid
+EMBED_CACHE_HASH_SIZE = 16   # dHash grid side -> HASH_SIZE^2 bit fingerprint
+EMBED_CACHE_MAX_HAMMING = 12 # Max differing fingerprint bits to count as the same crop
+EMBED_CACHE_BOX_TOLERANCE = 8  # Max box centre / width drift in pixels
+
+# Approximate Nearest Neighbour (very large galleries)
+ANN_ENABLED = False         # Use the IVF index in identify() instead of an exact scan
+ANN_MIN_GALLERY = 20000     # Below this many users exact search is used anyway
+ANN_NLIST = 1024            # Number of k-means buckets
+ANN_NPROBE = 16             # Buckets scanned per query (higher = better recall, slower)
+ANN_KMEANS_ITERS = 20       # k-means iterations when (re)training the index
 
 # Attendance Logic
+ATTENDANCE_BACKEND = 'journal'  # 'journal' (append-only CSV + snapshots) or 'sqlite' (WAL, indexed)
 COOLDOWN_SECONDS =  60    # 1 Minutes buffer for test you can put accordingly
+JOURNAL_FSYNC = True      # fsync the punch journal on every write (survives power loss)
+STATE_SNAPSHOT_EVERY = 100  # Punches between IN/OUT state snapshots (startup replays only the tail)
+PUNCH_WRITER_ASYNC = True  # Write punches from a background thread (state / cooldown stay immediate)
+PUNCH_FLUSH_INTERVAL = 0.25  # Seconds between coalesced journal writes
+PUNCH_FSYNC_POLICY = 'batch'  # 'batch' (fsync every write), 'interval' (every PUNCH_FSYNC_INTERVAL), 'none' (OS decides)
+PUNCH_FSYNC_INTERVAL = 5.0  # Seconds between fsyncs with the 'interval' policy
 
 # CSV Columns (Attendance Log Schema)
 CSV_COLUMNS = ['Name', 'Date', 'Punch In Time', 'Punch Out Time']
 
+# Reporting (report mode)
+REPORT_DAILY_PATH = os.path.join(DATA_DIR, "report_daily.csv")  # Persisted per-person daily rollups
+REPORT_STATE_PATH = os.path.join(DATA_DIR, "report_daily.state.json")  # Store position the rollups reflect
+WORK_START_TIME = "09:30:00"  # Punch-ins after this (plus grace) count as late
+LATE_GRACE_MINUTES = 5
+
 # Table Configuration (for UI display)
 TABLE_CONFIG = {
     "columns": [
@@ -1,53 +1,54 @@
 import os
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2' 
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
 import cv2
 import argparse
 import time
-from datetime import datetime  
 import sys
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.detector import FaceDetector
-from src.recognizer import FaceRecognizer
-from src.attendance import AttendanceManager
-from src.liveness import LivenessDetector
-from core.config import FRAME_WIDTH, FRAME_HEIGHT, LIVENESS_ENABLED
+# Heavy modules (TensorFlow via retinaface, torch via facenet) are imported
+# lazily in load_models() so model-free subcommands start instantly.
+from src.face_db import registered_names
+from core.config import DATA_DIR, FRAME_WIDTH, FRAME_HEIGHT, LIVENESS_ENABLED
+from core.config import API_PORT, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, ENROLL_WORKERS
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--mode', type=str, choices=['run', 'register'], required=True, help='Mode: run or register')
-    parser.add_argument('--name', type=str, help='Name of user (required for register)')
-    args = parser.parse_args()
-
-    # Initialize Modules
-    detector = FaceDetector()
-    recognizer = FaceRecognizer()
-    manager = AttendanceManager()
-    # liveness = LivenessDetector() if LIVENESS_ENABLED else None
-    liveness = None
-
-    # CHECK IF REGISTERING - VALIDATE NAME BEFORE STARTING
-    if args.mode == 'register':
-        if not args.name:
-            print("Error: You must provide --name for registration.")
-            return
-        
-        if recognizer.check_name_exists(args.name):
-            print(f"\n[ERROR] User '{args.name}' is already registered!")
-            print("[HINT] Please use a different name to register.\n")
-            return
-
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+@contextmanager
+def phase(name, timings):
+    """Times one startup phase into `timings`."""
+    start = time.perf_counter()
+    yield
+    timings.append((name, time.perf_counter() - start))
 
-    print(f"Starting System in {args.mode.upper()} mode...")
+def print_timings(timings):
+    print("Startup timings:")
+    for name, seconds in timings:
+        print(f"  {name:<22} {seconds:6.2f}s")
+    print(f"  {'total':<22} {sum(s for _, s in timings):6.2f}s")
 
-    # pending_user = None  # User awaiting liveness verification
+def load_models(timings):
+    """Imports, builds and warms up RetinaFace and FaceNet before the camera opens."""
+    with phase('import detector (TF)', timings):
+        from src.detector import FaceDetector
+    with phase('import recognizer', timings):
+        from src.recognizer import FaceRecognizer
+    with phase('load detector', timings):
+        detector = FaceDetector()
+        detector.load()
+    with phase('load recognizer + DB', timings):
+        recognizer = FaceRecognizer()
+    with phase('warm-up detector', timings):
+        detector.warmup()
+    with phase('warm-up recognizer', timings):
+        recognizer.warmup()
+    return detector, recognizer
 
+def run_register(args, cap, detector, recognizer):
+    """Interactive enrollment: press 'S' with a verified face to capture 5 samples."""
     while True:
         ret, frame = cap.read()
         if not ret: break
@@ -59,120 +60,47 @@ def main():
             for key in faces:
                 face_data = faces[key]
                 box = face_data['facial_area']
-                
+
                 valid_intent, msg = detector.verify_intent(face_data, frame.shape[1], frame.shape[0])
-                
+
                 color = (0, 0, 255)  # Red by default
-                
+
                 if valid_intent:
                     color = (0, 255, 255)  # Yellow (Processing)
-                    
-                    # --- MODE: REGISTER ---
-                    if args.mode == 'register':
-                        cv2.putText(frame, "Press 'S' to Capture (5 Samples)", (10, 30), 
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-                        
-                        if cv2.waitKey(1) & 0xFF == ord('s'):
-                            print(f"Starting capture for {args.name}...")
-                            samples = []
-                            sample_count = 0
-                            
-                            while sample_count < 5:
-                                ret, temp_frame = cap.read()
-                                if not ret: break
-                                
-                                temp_faces = detector.detect(temp_frame)
-                                if temp_faces:
-                                    temp_data = list(temp_faces.values())[0]
-                                    temp_box = temp_data['facial_area']
-                                    
-                                    cv2.rectangle(temp_frame, (temp_box[0], temp_box[1]), (temp_box[2], temp_box[3]), (0, 255, 0), 2)
-                                    cv2.putText(temp_frame, f"Capturing {sample_count+1}/5", (50, 240), 
-                                              cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
-                                    cv2.imshow('Face Attendance', temp_frame)
-                                    cv2.waitKey(200) 
-                                    
-                                    emb = recognizer.get_embedding(temp_frame, temp_data)
-                                    if emb is not None:
-                                        samples.append(emb)
-                                        sample_count += 1
-                                        print(f"Captured {sample_count}/5")
-                            
-                            if recognizer.register_face(args.name, samples):
-                                print(f"User {args.name} Registered Successfully!")
-                                return 
-                            else:
-                                print(f"Registration failed for {args.name}")
-                                return
-                            
-                    # --- MODE: RUN (Attendance with Liveness) ---
-                    elif args.mode == 'run':
-                        # Step 1: Initial face recognition
-                        emb = recognizer.get_embedding(frame, face_data)
-                        if emb is not None:
-                            name, dist = recognizer.identify(emb)
-                            
-                            if name != "Unknown":
-                                color = (0, 255, 0)  # Green
-                                
-                                # # Start liveness challenge
-                                # if LIVENESS_ENABLED and liveness is not None:
-                                #     pending_user = name
-                                #     challenge = liveness.start_challenge()
-                                #     print(f"[LIVENESS] Asking {name} to: {challenge}")
-                                # else:
-                                #     # Liveness disabled, proceed directly
-                                status, action = manager.process_punch(name)
-                                if status == "Success":
-                                    time_str = datetime.now().strftime('%d-%b %H:%M:%S')
-                                    display_text = f"{name}: {action}"
-                                    sub_text = f"at {time_str}"
-                                    cv2.putText(frame, display_text, (box[0], box[1]-30), 
-                                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                                    cv2.putText(frame, sub_text, (box[0], box[1]-10), 
-                                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 255, 200), 1)
-                                else:
-                                    cv2.putText(frame, f"{name}: Wait...", (box[0], box[1]-20), 
-                                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-                            else:
-                                cv2.putText(frame, "Unknown", (box[0], box[1]-10), 
-                                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-                        
-                        # # Step 2: Liveness verification
-                        # elif pending_user is not None and LIVENESS_ENABLED and liveness is not None:
-                            
-                        #     liveness.draw_eye_landmarks(frame, face_data['landmarks'])
-                        #     liveness_verified, liveness_msg = liveness.verify_challenge(face_data['landmarks'])
-
-                        #     if liveness_verified:
-                        #         # Liveness passed, now do punch
-                        #         color = (0, 255, 0)  # Green
-                        #         status, action = manager.process_punch(pending_user)
-                                
-                        #         if status == "Success":
-                        #             time_str = datetime.now().strftime('%d-%b %H:%M:%S')
-                        #             display_text = f"{pending_user}: {action}"
-                        #             sub_text = f"at {time_str}"
-                        #             cv2.putText(frame, display_text, (box[0], box[1]-30), 
-                        #                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                        #             cv2.putText(frame, sub_text, (box[0], box[1]-10), 
-                        #                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 255, 200), 1)
-                        #             cv2.putText(frame, liveness_msg, (box[0], box[1]+20), 
-                        #                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-                        #             pending_user = None
-                        #             liveness.reset()
-                        #     elif liveness.check_timeout():
-                        #         # Liveness failed - timeout
-                        #         color = (0, 0, 255)  # Red
-                        #         cv2.putText(frame, f"{liveness_msg}", (box[0], box[1]-30), 
-                        #                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                        #         pending_user = None
-                        #         liveness.reset()
-                        #     else:
-                        #         # Liveness in progress
-                        #         color = (0, 165, 255)  # Orange
-                        #         cv2.putText(frame, f"Liveness: {liveness_msg}", (box[0], box[1]-30), 
-                        #                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+                    cv2.putText(frame, "Press 'S' to Capture (5 Samples)", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+
+                    if cv2.waitKey(1) & 0xFF == ord('s'):
+                        print(f"Starting capture for {args.name}...")
+                        samples = []
+                        sample_count = 0
+
+                        while sample_count < 5:
+                            ret, temp_frame = cap.read()
+                            if not ret: break
+
+                            temp_faces = detector.detect(temp_frame)
+                            if temp_faces:
+                                temp_data = list(temp_faces.values())[0]
+                                temp_box = temp_data['facial_area']
+
+                                cv2.rectangle(temp_frame, (temp_box[0], temp_box[1]), (temp_box[2], temp_box[3]), (0, 255, 0), 2)
+                                cv2.putText(temp_frame, f"Capturing {sample_count+1}/5", (50, 240),
+                                          cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
+                                cv2.imshow('Face Attendance', temp_frame)
+                                cv2.waitKey(200)
+
+                                emb = recognizer.get_embedding(temp_frame, temp_data)
+                                if emb is not None:
+                                    samples.append(emb)
+                                    sample_count += 1
+                                    print(f"Captured {sample_count}/5")
+
+                        if recognizer.register_face(args.name, samples):
+                            print(f"User {args.name} Registered Successfully!")
+                        else:
+                            print(f"Registration failed for {args.name}")
+                        return
 
                 # Draw Face Box
                 cv2.rectangle(frame, (box[0], box[1]), (box[2], box[3]), color, 2)
@@ -180,12 +108,192 @@ def main():
                     cv2.putText(frame, msg, (box[0], box[1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
 
         cv2.imshow('Face Attendance', frame)
-        
+
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
-    cap.release()
-    cv2.destroyAllWindows()
+def run_attendance(cap, detector, recognizer, manager, liveness=None):
+    """
+    Attendance mode. Capture, detection and recognition run on worker threads;
+    this thread only renders the newest frame with the newest results.
+    """
+    from src.metrics import metrics
+    from src.pipeline import RunPipeline, draw_results
+    from src.tracker import FaceTracker
+
+    pipeline = RunPipeline(cap, detector, recognizer, manager, FaceTracker(), liveness=liveness)
+    pipeline.start()
+
+    shown_seq = -1
+    try:
+        while pipeline.running:
+            seq, frame, results = pipeline.latest()
+            if frame is not None and seq != shown_seq:
+                shown_seq = seq
+                frame = frame.copy()
+                detector.draw_roi(frame)
+                draw_results(frame, results)
+                metrics.draw_overlay(frame)
+                cv2.imshow('Face Attendance', frame)
+                metrics.tick('render')
+            metrics.maybe_dump()
+
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        pipeline.stop()
+        metrics.dump()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', type=str, choices=['run', 'register', 'enroll', 'check', 'process', 'serve', 'api', 'report'], required=True,
+                        help='Mode: run, register, enroll (bulk, from photos), check (is a name registered? no models loaded), '
+                             'process (headless, recorded video / image folder) '
+                             'serve (several cameras, shared models), api (local HTTP recognition API) '
+                             'or report (hours / late / missing punch-outs; no models loaded)')
+    parser.add_argument('--name', type=str, help='Name of user (required for register / check; filter for report)')
+    parser.add_argument('--source', type=str,
+                        help='Video file or image directory (process mode); folder-per-person or CSV manifest (enroll mode)')
+    parser.add_argument('--workers', type=int, default=ENROLL_WORKERS, help='Detection processes (enroll mode)')
+    parser.add_argument('--events', type=str, default=os.path.join(DATA_DIR, 'events.jsonl'),
+                        help='JSONL output for process mode')
+    parser.add_argument('--start-time', type=datetime.fromisoformat,
+                        help='Recording start, e.g. 2024-05-01T08:00:00 (process mode; frame times derive from it)')
+    parser.add_argument('--fps', type=float, help='Override source FPS (process mode)')
+    parser.add_argument('--sources', nargs='+', help='Camera indices, video files or stream URLs (serve mode)')
+    parser.add_argument('--display', action='store_true', help='Show one window per camera (serve mode)')
+    parser.add_argument('--port', type=int, default=API_PORT, help='Listening port (api mode)')
+    parser.add_argument('--max-batch', type=int, default=BATCH_MAX_SIZE, help='Max crops per FaceNet pass (serve / api)')
+    parser.add_argument('--max-wait-ms', type=float, default=BATCH_MAX_WAIT_MS,
+                        help='Max wait for a batch to fill (serve / api)')
+    parser.add_argument('--period', choices=['day', 'week', 'month'], default='day', help='Report totals per (report mode)')
+    parser.add_argument('--from', dest='date_from', type=str, help='First date YYYY-MM-DD (report mode)')
+    parser.add_argument('--to', dest='date_to', type=str, help='Last date YYYY-MM-DD (report mode)')
+    parser.add_argument('--out', type=str, help='Also write the report as CSV (report mode)')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute all daily rollups (report mode)')
+    args = parser.parse_args()
+
+    if args.mode == 'report':
+        # Works from the attendance store alone: no TensorFlow / torch import
+        from src.reports import build_report
+        report = build_report(args.period, args.date_from, args.date_to, args.name, args.rebuild)
+        print(report.to_string(index=False) if not report.empty else "No attendance in range.")
+        if args.out:
+            report.to_csv(args.out, index=False)
+            print(f"Report written to {args.out}")
+        return
+
+    if args.mode in ('process', 'enroll') and not args.source:
+        print(f"Error: You must provide --source for {args.mode} mode.")
+        return
+    if args.mode == 'process' and not os.path.isdir(args.source) and args.start_time is None:
+        print("Error: You must provide --start-time for a video source (frame times derive from it).")
+        return
+    if args.mode == 'serve' and not args.sources:
+        print("Error: You must provide --sources for serve mode.")
+        return
+
+    # CHECK IF REGISTERING - VALIDATE NAME BEFORE LOADING ANY MODEL
+    if args.mode in ('register', 'check'):
+        if not args.name:
+            print(f"Error: You must provide --name for {args.mode}.")
+            return
+
+        if args.name in registered_names():
+            if args.mode == 'check':
+                print(f"User '{args.name}' is registered.")
+                return
+            print(f"\n[ERROR] User '{args.name}' is already registered!")
+            print("[HINT] Please use a different name to register.\n")
+            return
+
+        if args.mode == 'check':
+            print(f"User '{args.name}' is not registered.")
+            return
+
+    # Initialize Modules
+    timings = []
+    if args.mode == 'enroll':
+        # Detection runs in the worker processes; only FaceNet is needed here
+        from src.enroll import enroll
+        with phase('import recognizer', timings):
+            from src.recognizer import FaceRecognizer
+        with phase('load recognizer + DB', timings):
+            recognizer = FaceRecognizer()
+        print_timings(timings)
+        summary = enroll(args.source, recognizer, args.workers)
+        print(f"Enrolled {summary['enrolled']} of {summary['people']} people "
+              f"({summary['existing']} already registered, {summary['no_usable_image']} without a usable photo, "
+              f"{summary['failed_images']} of {summary['images']} images skipped)")
+        return
+
+    detector, recognizer = load_models(timings)
+    manager = None
+    if args.mode in ('run', 'process', 'serve'):
+        from src.attendance import AttendanceManager
+        with phase('restore attendance', timings):
+            manager = AttendanceManager()
+    liveness = None
+    if LIVENESS_ENABLED and args.mode in ('run', 'process'):
+        from src.liveness import LivenessEngine
+        liveness = LivenessEngine()
+
+    # Everything below runs inside try/finally: Ctrl+C must still drain queued punches
+    try:
+        if args.mode == 'process':
+            from src.offline import process_source
+            print_timings(timings)
+            print(f"Processing {args.source} headless -> {args.events}")
+            summary = process_source(args.source, detector, recognizer, manager, args.events, args.start_time,
+                                     args.fps, liveness)
+            print(f"Processed {summary['frames']} frames in {summary['seconds']:.1f}s ({summary['fps']:.1f} FPS): "
+                  f"{summary['faces']} faces, {summary['accepted']} accepted, {summary['recognized']} recognized, "
+                  f"{summary['unknown']} unknown, {summary['punches']} punches")
+            return
+
+        if args.mode == 'api':
+            from src.api import RecognitionAPI
+            print_timings(timings)
+            RecognitionAPI(recognizer, detector, port=args.port, max_batch=args.max_batch,
+                           max_wait_ms=args.max_wait_ms).serve_forever()
+            return
+
+        if args.mode == 'serve':
+            from src.batcher import EmbeddingBatcher
+            from src.service import AttendanceService
+            print_timings(timings)
+            print(f"Serving {len(args.sources)} sources: {', '.join(args.sources)}")
+            batcher = EmbeddingBatcher(recognizer, args.max_batch, args.max_wait_ms)
+            AttendanceService(args.sources, detector, recognizer, manager, batcher).run(display=args.display)
+            cv2.destroyAllWindows()
+            return
+
+        with phase('open camera', timings):
+            cap = cv2.VideoCapture(0)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+        print_timings(timings)
+
+        print(f"Starting System in {args.mode.upper()} mode...")
+
+        try:
+            if args.mode == 'register':
+                run_register(args, cap, detector, recognizer)
+            else:
+                run_attendance(cap, detector, recognizer, manager, liveness)
+        finally:
+            cap.release()
+            cv2.destroyAllWindows()
+        if recognizer.embedding_cache is not None:
+            print(f"Embedding cache: {recognizer.embedding_cache.stats()}")
+    except KeyboardInterrupt:
+        print("Interrupted.")
+    finally:
+        if manager is not None:
+            manager.close()
+        if args.mode in ('process', 'serve'):
+            from src.metrics import metrics
+            metrics.dump()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,55 @@
+# src/alignment.py
+import cv2
+import numpy as np
+
+def align_face(frame, face_data):
+    """
+    Aligns and crops one face. Returns a 160x160 BGR uint8 image, or None.
+    """
+    box = face_data['facial_area']
+    landmarks = face_data['landmarks']
+
+    # 1. Alignment (Rotation based on eyes)
+    left_eye = landmarks['left_eye']
+    right_eye = landmarks['right_eye']
+    
+    dY = right_eye[1] - left_eye[1]
+    dX = right_eye[0] - left_eye[0]
+    angle = np.degrees(np.arctan2(dY, dX))
+    
+    # Explicitly cast to Python int() because OpenCV rejects NumPy int32/int64
+    center_x = int((box[0] + box[2]) / 2)
+    center_y = int((box[1] + box[3]) / 2)
+    center = (center_x, center_y)
+
+    # 2. Crop window (same box as before, clipped to the frame)
+    h, w = frame.shape[:2]
+    x1 = max(0, int(box[0]))
+    y1 = max(0, int(box[1]))
+    x2 = min(w, int(box[2]))
+    y2 = min(h, int(box[3]))
+    if x2 <= x1 or y2 <= y1:
+        return None # Handle empty crops
+
+    # 3. Single warp straight into 160x160:
+    # rotate about the box centre, then map the crop window onto the output
+    # (same pixel-centre convention as cv2.resize), so only the face's own
+    # pixels are sampled instead of rotating the whole frame.
+    sx = 160.0 / (x2 - x1)
+    sy = 160.0 / (y2 - y1)
+    S = np.array([[sx, 0.0, (0.5 - x1) * sx - 0.5],
+                  [0.0, sy, (0.5 - y1) * sy - 0.5],
+                  [0.0, 0.0, 1.0]])
+    try:
+        R = np.vstack([cv2.getRotationMatrix2D(center, angle, 1.0), [0.0, 0.0, 1.0]])
+    except Exception as e:
+        # Fallback if rotation fails (e.g. extreme coords)
+        print(f"Rotation failed: {e}")
+        R = np.eye(3)
+
+    try:
+        face_img = cv2.warpAffine(frame, (S @ R)[:2], (160, 160), flags=cv2.INTER_LINEAR)
+    except:
+        return None
+
+    return face_img
@@ -0,0 +1,171 @@
+# src/ann_index.py
+import json
+import os
+import numpy as np
+import torch
+from core.config import ANN_NLIST, ANN_NPROBE, ANN_KMEANS_ITERS
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index over the recognizer's gallery matrix.
+    Rows are bucketed by their nearest k-means centroid, and a query only
+    scans the rows of its `nprobe` closest buckets instead of the whole gallery.
+    The index stores row ids only; vectors stay in the gallery tensor.
+    """
+
+    TRAIN_SAMPLES_PER_LIST = 256  # k-means sample size per bucket
+    CHUNK_SIZE = 65536            # Rows per assignment chunk (bounds cdist memory)
+
+    def __init__(self, nlist=ANN_NLIST, nprobe=ANN_NPROBE):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None  # (nlist, 512)
+        self.lists = []        # bucket id -> list of gallery row ids
+        self.assignments = []  # gallery row id -> bucket id (what is persisted)
+        self.ntotal = 0
+        self.fingerprint = None  # gallery_fingerprint() of the rows indexed so far
+        self._list_cache = {}  # bucket id -> LongTensor of row ids
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def _assign(self, vectors, centroids):
+        """Nearest centroid for each row, computed in chunks."""
+        out = []
+        for start in range(0, vectors.shape[0], self.CHUNK_SIZE):
+            chunk = vectors[start:start + self.CHUNK_SIZE]
+            out.append(torch.cdist(chunk, centroids).argmin(dim=1))
+        if not out:
+            return torch.empty(0, dtype=torch.long)
+        return torch.cat(out)
+
+    def train(self, data, iters=ANN_KMEANS_ITERS, seed=0):
+        """
+        Runs k-means on (a sample of) the gallery to place the bucket centroids.
+        Clears any previously added rows.
+        """
+        n = data.shape[0]
+        if n == 0:
+            return
+        data = data.float()
+        nlist = min(self.nlist, n)
+        gen = torch.Generator().manual_seed(seed)
+
+        sample = data
+        max_sample = nlist * self.TRAIN_SAMPLES_PER_LIST
+        if n > max_sample:
+            sample = data[torch.randperm(n, generator=gen)[:max_sample]]
+
+        centroids = sample[torch.randperm(sample.shape[0], generator=gen)[:nlist]].clone()
+        for _ in range(iters):
+            assign = self._assign(sample, centroids)
+            sums = torch.zeros_like(centroids).index_add_(0, assign, sample)
+            counts = torch.bincount(assign, minlength=nlist).float().unsqueeze(1)
+            # Empty buckets keep their old centroid
+            centroids = torch.where(counts > 0, sums / counts.clamp(min=1), centroids)
+
+        self.nlist = nlist
+        self.centroids = centroids
+        self.lists = [[] for _ in range(nlist)]
+        self.assignments = []
+        self.ntotal = 0
+        self.fingerprint = None
+        self._list_cache = {}
+
+    def add(self, vectors):
+        """
+        Appends rows to the index. Their ids continue from ntotal, so callers
+        must add rows in the same order as they are appended to the gallery.
+        """
+        if not self.is_trained:
+            raise RuntimeError("IVFIndex must be trained before add()")
+        vectors = vectors.reshape(-1, self.centroids.shape[1]).float()
+        assign = self._assign(vectors, self.centroids).tolist()
+        for offset, list_id in enumerate(assign):
+            self.lists[list_id].append(self.ntotal + offset)
+            self._list_cache.pop(list_id, None)
+        self.assignments.extend(assign)
+        self.ntotal += len(assign)
+
+    def _list_ids(self, list_id):
+        ids = self._list_cache.get(list_id)
+        if ids is None:
+            ids = torch.tensor(self.lists[list_id], dtype=torch.long)
+            self._list_cache[list_id] = ids
+        return ids
+
+    def search(self, query, gallery, k=1, nprobe=None):
+        """
+        Approximate k-NN for a single (1, 512) query.
+        Returns (row_ids, distances) as LongTensor / FloatTensor, closest first.
+        """
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        query = query.reshape(1, -1).float()
+
+        centroid_dists = torch.cdist(query, self.centroids).squeeze(0)
+        probes = torch.topk(centroid_dists, nprobe, largest=False).indices.tolist()
+        candidates = [self._list_ids(p) for p in probes if self.lists[p]]
+        if not candidates:
+            return torch.empty(0, dtype=torch.long), torch.empty(0)
+        candidates = torch.cat(candidates)
+
+        dists = torch.cdist(query, gallery[candidates]).squeeze(0)
+        k = min(k, candidates.shape[0])
+        top_dists, top_pos = torch.topk(dists, k, largest=False)
+        return candidates[top_pos], top_dists
+
+    def save(self, path, start=0):
+        """
+        Persists the centroids and one int32 bucket id per row as raw buffers
+        (`path`.centroids / .assign) plus a small JSON header (`path`.json), like FaceStore.
+        Rows before `start` are already on disk, so adding users appends only their
+        bucket ids; the centroids are only written on a full save after training.
+        """
+        if start == 0 or not os.path.exists(f"{path}.assign"):
+            start = 0
+            if os.path.exists(f"{path}.json"):
+                os.remove(f"{path}.json")  # A rewrite interrupted midway must not look valid
+            with open(f"{path}.centroids", 'wb') as f:
+                f.write(self.centroids.float().contiguous().numpy().tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        with open(f"{path}.assign", 'ab') as f:
+            if os.path.getsize(f"{path}.assign") != start * 4:
+                f.truncate(start * 4)  # Full rewrite, or rows past the header from an interrupted save
+            f.write(np.asarray(self.assignments[start:], dtype=np.int32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        tmp_path = f"{path}.json.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'nlist': self.nlist, 'dim': self.centroids.shape[1], 'ntotal': self.ntotal,
+                       'fingerprint': self.fingerprint}, f)
+        os.replace(tmp_path, f"{path}.json")
+
+    @classmethod
+    def load(cls, path):
+        """Returns the persisted index, or None if missing or unreadable."""
+        if not os.path.exists(f"{path}.json"):
+            return None
+        try:
+            with open(f"{path}.json", encoding='utf-8') as f:
+                header = json.load(f)
+            nlist, dim, ntotal = int(header['nlist']), int(header['dim']), int(header['ntotal'])
+            centroids = np.fromfile(f"{path}.centroids", dtype=np.float32, count=nlist * dim)
+            assign = np.fromfile(f"{path}.assign", dtype=np.int32, count=ntotal)
+            if centroids.size != nlist * dim or assign.size != ntotal:
+                raise ValueError("index files are shorter than their header")
+        except Exception as e:
+            print(f"ANN index unreadable ({e}). It will be rebuilt.")
+            return None
+        index = cls(nlist=nlist, nprobe=ANN_NPROBE)
+        index.centroids = torch.from_numpy(centroids).reshape(nlist, dim)
+        # Bucket lists in row order, rebuilt from the per-row bucket ids
+        order = np.argsort(assign, kind='stable')
+        bounds = np.cumsum(np.bincount(assign, minlength=nlist))[:-1]
+        index.lists = [ids.tolist() for ids in np.split(order, bounds)]
+        index.assignments = assign.tolist()
+        index.ntotal = ntotal
+        index.fingerprint = header.get('fingerprint')
+        return index
@@ -0,0 +1,108 @@
+# src/api.py
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import cv2
+import numpy as np
+from core.config import API_HOST, API_PORT, API_MAX_BODY, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from src.batcher import EmbeddingBatcher
+from src.metrics import metrics
+
+class APIHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health                  -> {"users": N, "backend": "..."}
+    POST /identify                body = JPEG/PNG of one face crop -> {"name", "distance"}
+    POST /identify?detect=1       body = full frame -> {"faces": [{"box", "name", "distance"}, ...]}
+    """
+
+    api = None  # Bound to a RecognitionAPI by RecognitionAPI.__init__
+
+    def log_message(self, format, *args):
+        pass  # One line per request would flood the console under load
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/health':
+            return self.send_json(404, {'error': 'not found'})
+        self.send_json(200, {'users': len(self.api.recognizer.gallery_names), 'backend': self.api.recognizer.backend})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/identify':
+            return self.send_json(404, {'error': 'not found'})
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            return self.send_json(400, {'error': 'empty body'})
+        if length > API_MAX_BODY:
+            return self.send_json(413, {'error': f'image larger than {API_MAX_BODY} bytes'})
+        image = cv2.imdecode(np.frombuffer(self.rfile.read(length), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return self.send_json(400, {'error': 'could not decode image'})
+
+        try:
+            with metrics.time('api_request'):
+                if parse_qs(url.query).get('detect', ['0'])[0] in ('1', 'true'):
+                    if self.api.detector is None:
+                        return self.send_json(400, {'error': 'server started without a detector'})
+                    payload = {'faces': self.api.identify_frame(image)}
+                else:
+                    payload = self.api.identify_crop(image)
+        except Exception as e:
+            print(f"API Error: {e}")
+            return self.send_json(500, {'error': str(e)})
+        self.send_json(200, payload)
+
+class RecognitionAPI:
+    """
+    Local HTTP front end to FaceRecognizer. Each request runs on its own thread;
+    their forward passes are coalesced by one EmbeddingBatcher.
+    """
+
+    def __init__(self, recognizer, detector=None, host=API_HOST, port=API_PORT,
+                 max_batch=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.recognizer = recognizer
+        self.detector = detector.share() if detector is not None else None
+        self.batcher = EmbeddingBatcher(recognizer, max_batch, max_wait_ms)
+        handler = type('BoundAPIHandler', (APIHandler,), {'api': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+
+    def identify_crop(self, image):
+        """A tight face crop, resized to FaceNet's 160x160 input (no alignment: there are no landmarks)."""
+        crop = cv2.resize(image, (160, 160), interpolation=cv2.INTER_LINEAR)
+        emb = self.batcher.embed_crops([crop])
+        name, dist = self.recognizer.identify_batch([emb])[0]
+        return {'name': name, 'distance': round(float(dist), 4)}
+
+    def identify_frame(self, image):
+        """Detection + alignment as in run mode (intent checks are not applied)."""
+        faces = self.detector.detect(image)
+        if not isinstance(faces, dict) or not faces:
+            return []
+        faces = list(faces.values())
+        embs = self.recognizer.get_embeddings(image, faces, embed=self.batcher.embed_crops)
+        found = [(face, emb) for face, emb in zip(faces, embs) if emb is not None]
+        identities = self.recognizer.identify_batch([emb for _, emb in found])
+        return [{'box': [int(v) for v in face['facial_area']], 'name': name, 'distance': round(float(dist), 4)}
+                for (face, _), (name, dist) in zip(found, identities)]
+
+    def serve_forever(self):
+        self.batcher.start()
+        host, port = self.server.server_address[:2]
+        print(f"Recognition API listening on http://{host}:{port} "
+              f"(max batch {self.batcher.max_batch}, max wait {self.batcher.max_wait * 1000:.0f} ms)")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            self.batcher.stop()
@@ -1,35 +1,116 @@
-import pandas as pd
 from datetime import datetime, timedelta
+import json
 import os
-from core.config import LOG_PATH, COOLDOWN_SECONDS, CSV_COLUMNS
+from core.config import LOG_PATH, JOURNAL_PATH, STATE_SNAPSHOT_PATH, COOLDOWN_SECONDS, STATE_SNAPSHOT_EVERY
+from core.config import PUNCH_WRITER_ASYNC, ATTENDANCE_BACKEND, ATTENDANCE_DB_PATH
+from src.journal import PunchJournal
+from src.metrics import metrics
+from src.punch_writer import PunchWriter
 
 class AttendanceManager:
-    def __init__(self):
+    def __init__(self, journal_path=JOURNAL_PATH, log_path=LOG_PATH, snapshot_path=STATE_SNAPSHOT_PATH,
+                 async_writes=PUNCH_WRITER_ASYNC, backend=ATTENDANCE_BACKEND, db_path=ATTENDANCE_DB_PATH):
         self.user_state = {} # {Name: "IN" or "OUT"}
         self.last_action_time = {} # {Name: datetime object}
+        self.written_state = {} # user_state as of the punches already in the journal (what snapshots store)
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.backend = backend
+        self.journal = PunchJournal(journal_path)
+        if backend == 'sqlite':
+            from src.sqlite_store import SQLiteAttendanceStore
+            self.store = SQLiteAttendanceStore(db_path)
+        else:
+            self.store = self.journal  # Where punches are written
+        self.punches_since_snapshot = 0
         self.load_logs()
+        self.writer = PunchWriter(self.store, self.on_written).start() if async_writes else None
 
     def load_logs(self):
-        if os.path.exists(LOG_PATH):
-            try:
-                df = pd.read_csv(LOG_PATH)
-                if not df.empty:
-                    # Get the last entry for each user to restore their state
-                    for name in df['Name'].unique():
-                        user_df = df[df['Name'] == name]
-                        last_row = user_df.iloc[-1]
-                        
-                        # If punch out time is NaN, user is still IN
-                        punch_out = last_row['Punch Out Time']
-                        self.user_state[name] = "OUT" if (pd.notna(punch_out) and str(punch_out).strip()) else "IN"
-                        
-                        # Set cooldown time
-                        self.last_action_time[name] = datetime.now() - timedelta(days=1)
-            except Exception as e:
-                print(f"Error loading logs: {e}")
-
-    def process_punch(self, name):
-        now = datetime.now()
+        if self.backend == 'sqlite':
+            return self.load_store()
+        try:
+            # One-time migration: seed the journal from an existing attendance table
+            if not self.journal.exists() and os.path.exists(self.log_path):
+                count = self.journal.import_table(self.log_path)
+                print(f"Imported {count} punches from {self.log_path} into the journal.")
+
+            # Start from the last snapshot, then replay only the journal tail
+            offset = self.load_snapshot()
+            replayed = 0
+            for _, _, name, action in self.journal.events(offset):
+                self.user_state[name] = "IN" if action == "PUNCH IN" else "OUT"
+                replayed += 1
+
+            # No cooldown carried over a restart (punches before it may be backfilled from footage)
+            for name in self.user_state:
+                self.last_action_time[name] = datetime.min
+
+            self.written_state = dict(self.user_state)
+            if replayed:
+                self.save_snapshot()
+        except Exception as e:
+            print(f"Error loading logs: {e}")
+
+    def load_store(self):
+        """
+        SQLite backend: state is one indexed row per user, no replay.
+        Seeded once from the journal (or the CSV table) when the database is new.
+        """
+        try:
+            if not self.store.exists():
+                if self.journal.exists():
+                    count = self.store.import_events(self.journal.replay())
+                    print(f"Imported {count} punches from {self.journal.path} into {self.store.path}.")
+                elif os.path.exists(self.log_path):
+                    count = self.store.import_table(self.log_path)
+                    print(f"Imported {count} punches from {self.log_path} into {self.store.path}.")
+
+            self.user_state = self.store.load_state()
+            for name in self.user_state:
+                self.last_action_time[name] = datetime.min
+            self.written_state = dict(self.user_state)
+        except Exception as e:
+            print(f"Error loading logs: {e}")
+
+    def load_snapshot(self):
+        """
+        Restores user_state from the snapshot file.
+        Returns the journal offset to resume replay from (0 if no usable snapshot).
+        """
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            offset = int(snapshot['journal_offset'])
+            if offset > self.journal.size():
+                # Journal was replaced or truncated: snapshot no longer applies
+                return 0
+            self.user_state = dict(snapshot['user_state'])
+            return offset
+        except Exception as e:
+            print(f"Ignoring unreadable state snapshot: {e}")
+            self.user_state = {}
+            return 0
+
+    def save_snapshot(self):
+        """
+        Persists the state of the punches already written, together with the journal
+        offset it reflects (queued punches are not in either). Written atomically.
+        """
+        if self.backend == 'sqlite':
+            return  # user_state table is updated with every punch
+        snapshot = {'journal_offset': self.journal.size(), 'user_state': self.written_state}
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.snapshot_path)
+        self.punches_since_snapshot = 0
+
+    def process_punch(self, name, now=None):
+        # `now` lets offline processing punch at the recorded frame time
+        now = now or datetime.now()
         
         # Initialize user if not seen before
         if name not in self.last_action_time:
@@ -37,10 +118,11 @@ class AttendanceManager:
         if name not in self.user_state:
             self.user_state[name] = "OUT"
 
-        # Check Cooldown (Debounce)
+        # Check Cooldown (Debounce). A punch dated before the last one (backfilled footage) is not debounced
         last_time = self.last_action_time[name]
-        if (now - last_time).total_seconds() < COOLDOWN_SECONDS:
-            remaining = int(COOLDOWN_SECONDS - (now - last_time).total_seconds())
+        elapsed = (now - last_time).total_seconds()
+        if 0 <= elapsed < COOLDOWN_SECONDS:
+            remaining = int(COOLDOWN_SECONDS - elapsed)
             return "Wait", f"Wait {remaining}s"
 
         # Determine Action based on current state
@@ -50,41 +132,54 @@ class AttendanceManager:
         self.user_state[name] = "IN" if action == "PUNCH IN" else "OUT"
         self.last_action_time[name] = now
         
-        # Log to CSV
-        self.log_to_csv(name, now, action)
+        # Append to journal
+        self.log_punch(name, now, action)
         
         return "Success", action
 
-    def log_to_csv(self, name, time, action):
-        today_date = time.strftime('%Y-%m-%d')
-        time_str = time.strftime('%H:%M:%S')
-        
-        # Ensure CSV file exists with headers
-        if not os.path.exists(LOG_PATH):
-            df = pd.DataFrame(columns=CSV_COLUMNS)
-            # Set all columns as string type
-            for col in CSV_COLUMNS:
-                df[col] = df[col].astype(str)
-            df.to_csv(LOG_PATH, index=False)
-        
-        # Load existing data and ensure proper dtype
-        df = pd.read_csv(LOG_PATH, dtype=str)
-        
-        # Find today's entry for this user
-        today_mask = (df['Name'] == name) & (df['Date'] == today_date)
-        
-        if action == "PUNCH IN":
-            if today_mask.any():
-                df.loc[today_mask, 'Punch In Time'] = time_str
-            else:
-                new_row = pd.DataFrame([[name, today_date, time_str, '']], columns=CSV_COLUMNS)
-                df = pd.concat([df, new_row], ignore_index=True)
-        else:  # PUNCH OUT
-            if today_mask.any():
-                df.loc[today_mask, 'Punch Out Time'] = time_str
-            else:
-                new_row = pd.DataFrame([[name, today_date, '', time_str]], columns=CSV_COLUMNS)
-                df = pd.concat([df, new_row], ignore_index=True)
-        
-        df.to_csv(LOG_PATH, index=False)
-        print(f"Logged: {name} - {action} at {time_str}")
\ No newline at end of file
+    def log_punch(self, name, time, action):
+        """
+        Appends the punch to the journal: O(1), no read-modify-write of the CSV.
+        With the background writer it is only queued here.
+        """
+        if self.writer is not None:
+            self.writer.submit(name, time, action)
+        else:
+            with metrics.time('punch_write'):
+                self.store.append(name, time, action)
+            self.on_written([(name, time, action)])
+        print(f"Logged: {name} - {action} at {time.strftime('%H:%M:%S')}")
+
+    def on_written(self, events):
+        """Called once punches are in the journal (on the writer thread when async)."""
+        for name, _, action in events:
+            self.written_state[name] = "IN" if action == "PUNCH IN" else "OUT"
+        self.punches_since_snapshot += len(events)
+        if self.punches_since_snapshot >= STATE_SNAPSHOT_EVERY:
+            self.save_snapshot()
+
+    def records(self, start_date=None, end_date=None, name=None):
+        """
+        Attendance rows (CSV_COLUMNS lists) with start_date <= Date <= end_date
+        ('YYYY-MM-DD', either bound optional), optionally for one name.
+        Indexed with the SQLite backend; a journal scan otherwise.
+        """
+        return self.store.records(start_date, end_date, name)
+
+    def export_csv(self, csv_path=None):
+        """
+        Materializes the Name/Date/Punch In/Punch Out table from the journal (or database).
+        """
+        csv_path = csv_path or self.log_path
+        rows = self.store.materialize(csv_path)
+        print(f"Attendance table written: {rows} rows -> {csv_path}")
+
+    def close(self):
+        """Drains queued punches, flushes the journal, snapshots state and refreshes the CSV view."""
+        if self.writer is not None:
+            self.writer.close()
+        self.journal.close()
+        self.save_snapshot()
+        self.export_csv()
+        if self.store is not self.journal:
+            self.store.close()
\ No newline at end of file
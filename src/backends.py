@@ -0,0 +1,84 @@
+# src/backends.py
+import copy
+import os
+import numpy as np
+import torch
+from core.config import MODEL_CACHE_DIR
+
+BACKENDS = ('eager', 'torchscript', 'int8', 'onnx')
+
+def _cache_path(filename):
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    return os.path.join(MODEL_CACHE_DIR, filename)
+
+def _example_input(device):
+    return torch.zeros((1, 3, 160, 160), device=device)
+
+def _eager(model, device):
+    def infer(batch):
+        with torch.no_grad():
+            return model(batch.to(device)).cpu()
+    return infer
+
+def _torchscript(model, device):
+    """Traced + frozen TorchScript module, cached per device type."""
+    path = _cache_path(f"facenet_vggface2_{device.type}.ts.pt")
+    if os.path.exists(path):
+        scripted = torch.jit.load(path, map_location=device)
+    else:
+        print(f"Exporting TorchScript FaceNet to {path}...")
+        with torch.no_grad():
+            scripted = torch.jit.freeze(torch.jit.trace(model, _example_input(device)))
+        torch.jit.save(scripted, path)
+    return _eager(scripted, device)
+
+def _int8(model, device):
+    """
+    Dynamically quantized model (CPU only). In InceptionResnetV1 only the final
+    Linear layer is quantizable this way; convolutions stay float32.
+    """
+    cpu = torch.device('cpu')
+    path = _cache_path("facenet_vggface2_int8.ts.pt")
+    if os.path.exists(path):
+        quantized = torch.jit.load(path, map_location=cpu)
+    else:
+        print(f"Exporting int8 FaceNet to {path}...")
+        quantized = torch.ao.quantization.quantize_dynamic(copy.deepcopy(model).to(cpu), {torch.nn.Linear}, dtype=torch.qint8)
+        with torch.no_grad():
+            quantized = torch.jit.trace(quantized, _example_input(cpu))
+        torch.jit.save(quantized, path)
+    return _eager(quantized, cpu)
+
+def _onnx(model, device):
+    """ONNX Runtime CPU session over an exported graph with a dynamic batch axis."""
+    import onnxruntime as ort
+
+    path = _cache_path("facenet_vggface2.onnx")
+    if not os.path.exists(path):
+        print(f"Exporting ONNX FaceNet to {path}...")
+        cpu = torch.device('cpu')
+        torch.onnx.export(copy.deepcopy(model).to(cpu), _example_input(cpu), path, input_names=['input'],
+                          output_names=['embedding'], dynamic_axes={'input': {0: 'batch'}, 'embedding': {0: 'batch'}},
+                          opset_version=17)
+    session = ort.InferenceSession(path, providers=['CPUExecutionProvider'])
+
+    def infer(batch):
+        out = session.run(None, {'input': batch.cpu().numpy().astype(np.float32)})[0]
+        return torch.from_numpy(out)
+    return infer
+
+def load_backend(name, model, device):
+    """
+    Returns (infer, name_used). infer(batch) maps a (B, 3, 160, 160) float tensor to
+    (B, 512) CPU embeddings. Falls back to eager PyTorch if the requested backend
+    cannot be loaded, in which case name_used is 'eager'.
+    """
+    loaders = {'eager': _eager, 'torchscript': _torchscript, 'int8': _int8, 'onnx': _onnx}
+    if name not in loaders:
+        print(f"Unknown FaceNet backend '{name}'. Using eager.")
+        name = 'eager'
+    try:
+        return loaders[name](model, device), name
+    except Exception as e:
+        print(f"FaceNet backend '{name}' unavailable ({e}). Using eager.")
+        return _eager(model, device), 'eager'
@@ -0,0 +1,81 @@
+# src/batcher.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from core.config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from src.metrics import metrics
+
+class EmbeddingBatcher:
+    """
+    Coalesces embedding requests from many threads into batched FaceNet passes.
+    One worker thread owns the model: it takes the first pending request, then keeps
+    collecting until `max_batch` crops are queued or `max_wait_ms` has passed.
+    """
+
+    def __init__(self, recognizer, max_batch=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.recognizer = recognizer
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()  # (crops, Future)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+
+    def submit(self, crops):
+        """Queues aligned 160x160 crops; the Future resolves to a (len(crops), 512) tensor."""
+        future = Future()
+        self.requests.put((crops, future))
+        return future
+
+    def embed_crops(self, crops):
+        """Blocking drop-in for FaceRecognizer.embed_crops()."""
+        return self.submit(crops).result()
+
+    def _collect(self):
+        try:
+            first = self.requests.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            crops = [crop for request_crops, _ in batch for crop in request_crops]
+            try:
+                embs = self.recognizer.embed_crops(crops)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            metrics.inc('embed_batches')
+            metrics.inc('embed_batched_crops', len(crops))
+            start = 0
+            for request_crops, future in batch:
+                future.set_result(embs[start:start + len(request_crops)])
+                start += len(request_crops)
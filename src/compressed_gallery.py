@@ -0,0 +1,161 @@
+# src/compressed_gallery.py
+import json
+import os
+import numpy as np
+import torch
+from core.config import GALLERY_RERANK
+
+DTYPES = ('float16', 'int8')
+
+class CompressedGallery:
+    """
+    Reduced-precision copy of the gallery matrix for the first search pass.
+      float16 - 2 bytes per value
+      int8    - 1 byte per value plus one float32 scale per row (max |x| / 127)
+    Candidates are re-ranked against the full-precision (memory-mapped) gallery,
+    so only `rerank` float32 rows per query are touched.
+    """
+
+    CHUNK_SIZE = 16384  # Rows decoded per block (bounds the float32 scratch memory)
+
+    def __init__(self, dtype='float16', rerank=GALLERY_RERANK):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown gallery dtype '{dtype}'. Choose from: {', '.join(DTYPES)}")
+        self.dtype = dtype
+        self.rerank = rerank
+        self.codes = None   # (N, 512) float16 or int8
+        self.scales = None  # (N,) float32, int8 only
+        self.norms = None   # (N,) squared norms of the decoded rows
+        self.ntotal = 0
+        self.fingerprint = None  # gallery_fingerprint() of the rows encoded so far
+
+    def nbytes(self):
+        if self.codes is None:
+            return 0
+        total = self.codes.numel() * self.codes.element_size() + self.norms.numel() * 4
+        if self.scales is not None:
+            total += self.scales.numel() * 4
+        return total
+
+    def _encode(self, vectors):
+        vectors = vectors.float()
+        if self.dtype == 'float16':
+            codes = vectors.half()
+            return codes, None, codes.float().pow(2).sum(dim=1)
+        scales = (vectors.abs().amax(dim=1) / 127.0).clamp(min=1e-12)
+        codes = torch.round(vectors / scales.unsqueeze(1)).clamp(-127, 127).to(torch.int8)
+        return codes, scales, (codes.float() * scales.unsqueeze(1)).pow(2).sum(dim=1)
+
+    def add(self, vectors):
+        """Appends rows; like IVFIndex.add(), in gallery order."""
+        vectors = vectors.reshape(-1, vectors.shape[-1])
+        parts = [self._encode(vectors[start:start + self.CHUNK_SIZE])
+                 for start in range(0, vectors.shape[0], self.CHUNK_SIZE)]
+        if not parts:
+            return
+        codes = torch.cat([p[0] for p in parts])
+        norms = torch.cat([p[2] for p in parts])
+        scales = torch.cat([p[1] for p in parts]) if self.dtype == 'int8' else None
+        if self.codes is None:
+            self.codes, self.scales, self.norms = codes, scales, norms
+        else:
+            self.codes = torch.cat([self.codes, codes])
+            self.norms = torch.cat([self.norms, norms])
+            if scales is not None:
+                self.scales = torch.cat([self.scales, scales])
+        self.ntotal += codes.shape[0]
+
+    def approx_search(self, queries, k):
+        """
+        Top-k by approximate distance, scanning the codes block by block.
+        Returns (row_ids (Q, k), approximate squared distances (Q, k)).
+        """
+        queries = queries.float()
+        q_norms = queries.pow(2).sum(dim=1, keepdim=True)
+        best_d, best_i = [], []
+        for start in range(0, self.ntotal, self.CHUNK_SIZE):
+            block = self.codes[start:start + self.CHUNK_SIZE].float()
+            dots = queries @ block.T
+            if self.scales is not None:
+                dots *= self.scales[start:start + self.CHUNK_SIZE]
+            dists = q_norms + self.norms[start:start + self.CHUNK_SIZE] - 2 * dots
+            d, i = torch.topk(dists, min(k, dists.shape[1]), dim=1, largest=False)
+            best_d.append(d)
+            best_i.append(i + start)
+        dists, pos = torch.topk(torch.cat(best_d, dim=1), min(k, self.ntotal), dim=1, largest=False)
+        return torch.gather(torch.cat(best_i, dim=1), 1, pos), dists
+
+    def search(self, queries, gallery, k=1, rerank=None):
+        """
+        k-NN for (Q, 512) queries: approximate pass over the codes, then exact L2
+        on the top `rerank` candidates from the float32 `gallery`.
+        Returns (row_ids (Q, k), distances (Q, k)), closest first.
+        """
+        queries = queries.reshape(-1, queries.shape[-1]).float()
+        k = min(k, self.ntotal)
+        rerank = self.rerank if rerank is None else rerank
+        candidates, approx = self.approx_search(queries, max(k, rerank))
+        if rerank <= 0:
+            return candidates[:, :k], approx[:, :k].clamp(min=0).sqrt()
+
+        rows = gallery[candidates.reshape(-1)].float().reshape(candidates.shape[0], candidates.shape[1], -1)
+        exact = (rows - queries.unsqueeze(1)).norm(dim=2)
+        top_dists, top_pos = torch.topk(exact, k, dim=1, largest=False)
+        return torch.gather(candidates, 1, top_pos), top_dists
+
+    def _columns(self, dim):
+        """(name, numpy dtype, values per row) of each persisted buffer."""
+        columns = [('codes', np.float16 if self.dtype == 'float16' else np.int8, dim), ('norms', np.float32, 1)]
+        if self.dtype == 'int8':
+            columns.append(('scales', np.float32, 1))
+        return columns
+
+    def save(self, path, start=0):
+        """
+        Persists the codes as headerless raw buffers (`path`.codes / .norms / .scales) plus
+        a small JSON header (`path`.json), like FaceStore. Rows before `start` are already
+        on disk, so adding users appends only the new rows; the header is written last.
+        """
+        dim = self.codes.shape[1]
+        if start == 0 and os.path.exists(f"{path}.json"):
+            os.remove(f"{path}.json")  # A rewrite interrupted midway must not look valid
+        for name, np_dtype, width in self._columns(dim):
+            file_path = f"{path}.{name}"
+            first = start if os.path.exists(file_path) else 0
+            size = first * width * np.dtype(np_dtype).itemsize
+            data = getattr(self, name)[first:].contiguous().numpy()
+            with open(file_path, 'ab') as f:
+                if os.path.getsize(file_path) != size:
+                    f.truncate(size)  # Full rewrite, or rows past the header from an interrupted save
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        tmp_path = f"{path}.json.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dtype': self.dtype, 'dim': dim, 'ntotal': self.ntotal, 'fingerprint': self.fingerprint}, f)
+        os.replace(tmp_path, f"{path}.json")
+
+    @classmethod
+    def load(cls, path, dtype):
+        """Returns the persisted gallery if it exists and matches `dtype`, else None."""
+        if not os.path.exists(f"{path}.json"):
+            return None
+        try:
+            with open(f"{path}.json", encoding='utf-8') as f:
+                header = json.load(f)
+            if header['dtype'] != dtype:
+                return None
+            gallery = cls(dtype)
+            gallery.ntotal = int(header['ntotal'])
+            for name, np_dtype, width in gallery._columns(int(header['dim'])):
+                values = np.fromfile(f"{path}.{name}", dtype=np_dtype, count=gallery.ntotal * width)
+                if values.size != gallery.ntotal * width:
+                    raise ValueError(f"{path}.{name} is shorter than its header")
+                values = torch.from_numpy(values)
+                setattr(gallery, name, values.reshape(gallery.ntotal, width) if width > 1 else values)
+            gallery.fingerprint = header.get('fingerprint')
+        except Exception as e:
+            print(f"Compressed gallery unreadable ({e}). It will be rebuilt.")
+            return None
+        return gallery
@@ -1,15 +1,91 @@
+import threading
+from contextlib import nullcontext
 import cv2
 import numpy as np
-from retinaface import RetinaFace
-from core.config import RETINA_CONFIDENCE, MIN_FACE_WIDTH, ROI_CENTER_PCT, GAZE_THRESHOLD_LOW, GAZE_THRESHOLD_HIGH
+from core.config import FRAME_WIDTH, FRAME_HEIGHT, RETINA_CONFIDENCE, MIN_FACE_WIDTH, ROI_CENTER_PCT, GAZE_THRESHOLD_LOW, GAZE_THRESHOLD_HIGH
+from core.config import DETECT_ROI_ONLY, DETECT_ROI_MARGIN, DETECT_SCALE
+
+def roi_box(frame_width, frame_height):
+    """The central 'Magic Box' as (x1, y1, x2, y2)."""
+    roi_x1 = int(frame_width * (0.5 - ROI_CENTER_PCT/2))
+    roi_x2 = int(frame_width * (0.5 + ROI_CENTER_PCT/2))
+    roi_y1 = int(frame_height * 0.2)
+    roi_y2 = int(frame_height * 0.8)
+    return roi_x1, roi_y1, roi_x2, roi_y2
+
 class FaceDetector:
+    def __init__(self, roi_only=DETECT_ROI_ONLY, scale=DETECT_SCALE, margin=DETECT_ROI_MARGIN, lock=None):
+        self.roi_only = roi_only
+        self.scale = scale
+        self.margin = margin
+        self.model = None  # Built lazily: importing retinaface pulls in TensorFlow
+        self.lock = lock   # Serializes RetinaFace calls when the model is shared between threads
+
+    def share(self):
+        """
+        A detector for another stream: same RetinaFace network and lock,
+        its own ROI settings (frames of any size get their own ROI box).
+        """
+        if self.lock is None:
+            self.lock = threading.Lock()
+        view = FaceDetector(self.roi_only, self.scale, self.margin, self.lock)
+        view.model = self.load()
+        return view
+
+    def load(self):
+        """Imports RetinaFace and builds its network once."""
+        if self.model is None:
+            from retinaface import RetinaFace
+            self.model = RetinaFace.build_model()
+        return self.model
+
+    def warmup(self, width=FRAME_WIDTH, height=FRAME_HEIGHT):
+        """Builds the model and runs one dummy frame so the first real frame is not slow."""
+        self.detect(np.zeros((height, width, 3), dtype=np.uint8))
+
+    def _detect_faces(self, img, **kwargs):
+        from retinaface import RetinaFace
+        with self.lock or nullcontext():
+            return RetinaFace.detect_faces(img, model=self.load(), **kwargs)
+
     def detect(self, frame):
         """
         Wrapper for RetinaFace. 
         Returns a dictionary of faces or empty dict.
         """
+        if self.roi_only:
+            return self.detect_roi(frame)
         # RetinaFace returns a dict: {'face_1': {'score': ..., 'facial_area': ..., 'landmarks': ...}}
-        return RetinaFace.detect_faces(frame)
+        return self._detect_faces(frame)
+
+    def detect_roi(self, frame):
+        """
+        Runs RetinaFace on the ROI crop (plus margin), optionally downscaled, and maps
+        boxes and landmarks back to full-frame coordinates. Faces outside the crop
+        would fail the ROI intent check anyway.
+        """
+        h, w = frame.shape[:2]
+        roi_x1, roi_y1, roi_x2, roi_y2 = roi_box(w, h)
+        pad_x, pad_y = int(w * self.margin), int(h * self.margin)
+        x1, y1 = max(0, roi_x1 - pad_x), max(0, roi_y1 - pad_y)
+        x2, y2 = min(w, roi_x2 + pad_x), min(h, roi_y2 + pad_y)
+
+        crop = frame[y1:y2, x1:x2]
+        if self.scale != 1.0:
+            crop = cv2.resize(crop, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+        # RetinaFace upscales small inputs by default, which would undo the saving
+        faces = self._detect_faces(crop, allow_upscaling=False)
+        if not isinstance(faces, dict):
+            return faces
+
+        for face_data in faces.values():
+            bx1, by1, bx2, by2 = face_data['facial_area']
+            face_data['facial_area'] = [int(round(bx1 / self.scale)) + x1, int(round(by1 / self.scale)) + y1,
+                                        int(round(bx2 / self.scale)) + x1, int(round(by2 / self.scale)) + y1]
+            for key, point in face_data['landmarks'].items():
+                face_data['landmarks'][key] = [point[0] / self.scale + x1, point[1] / self.scale + y1]
+        return faces
 
     def verify_intent(self, face_data, frame_width, frame_height):
         """
@@ -30,10 +106,7 @@ class FaceDetector:
         x1, y1, x2, y2 = box
         cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
         
-        roi_x1 = int(frame_width * (0.5 - ROI_CENTER_PCT/2))
-        roi_x2 = int(frame_width * (0.5 + ROI_CENTER_PCT/2))
-        roi_y1 = int(frame_height * 0.2)
-        roi_y2 = int(frame_height * 0.8)
+        roi_x1, roi_y1, roi_x2, roi_y2 = roi_box(frame_width, frame_height)
 
         if not (roi_x1 < cx < roi_x2 and roi_y1 < cy < roi_y2):
             return False, "Step in Box"
@@ -61,8 +134,5 @@ class FaceDetector:
     def draw_roi(self, frame):
         """Draws the white box to guide the user."""
         h, w, _ = frame.shape
-        roi_x1 = int(w * (0.5 - ROI_CENTER_PCT/2))
-        roi_x2 = int(w * (0.5 + ROI_CENTER_PCT/2))
-        roi_y1 = int(h * 0.2)
-        roi_y2 = int(h * 0.8)
+        roi_x1, roi_y1, roi_x2, roi_y2 = roi_box(w, h)
         cv2.rectangle(frame, (roi_x1, roi_y1), (roi_x2, roi_y2), (255, 255, 255), 1)
\ No newline at end of file
@@ -0,0 +1,89 @@
+# src/embedding_cache.py
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+from core.config import (EMBED_CACHE_SIZE, EMBED_CACHE_TTL, EMBED_CACHE_HASH_SIZE,
+                         EMBED_CACHE_MAX_HAMMING, EMBED_CACHE_BOX_TOLERANCE)
+
+def crop_fingerprint(crop, hash_size=EMBED_CACHE_HASH_SIZE):
+    """
+    Difference hash (dHash) of an aligned face crop as a Python int:
+    one bit per horizontally adjacent pixel pair of a downsampled grayscale image.
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+class EmbeddingCache:
+    """
+    Bounded LRU + TTL cache of FaceNet embeddings for near-duplicate crops.
+    An entry matches when its box is within EMBED_CACHE_BOX_TOLERANCE pixels and its
+    crop fingerprint differs in at most EMBED_CACHE_MAX_HAMMING bits.
+    """
+
+    def __init__(self, max_size=EMBED_CACHE_SIZE, ttl=EMBED_CACHE_TTL,
+                 max_hamming=EMBED_CACHE_MAX_HAMMING, box_tolerance=EMBED_CACHE_BOX_TOLERANCE):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_hamming = max_hamming
+        self.box_tolerance = box_tolerance
+        self.entries = OrderedDict()  # {key: (fingerprint, (cx, cy, width), embedding, stored_at)}
+        self.lock = threading.Lock()
+        self._next_key = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @staticmethod
+    def _box_key(box):
+        return ((box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0, box[2] - box[0])
+
+    def _box_close(self, a, b):
+        return all(abs(x - y) <= self.box_tolerance for x, y in zip(a, b))
+
+    def get(self, crop, box):
+        """
+        Returns (embedding or None, fingerprint). Pass the fingerprint back to put() on a miss.
+        """
+        fingerprint = crop_fingerprint(crop)
+        box_key = self._box_key(box)
+        now = time.time()
+
+        with self.lock:
+            for key in list(self.entries):
+                fp, cached_box, emb, stored_at = self.entries[key]
+                if now - stored_at > self.ttl:
+                    del self.entries[key]
+                    self.expired += 1
+                    continue
+                if self._box_close(box_key, cached_box) and bin(fp ^ fingerprint).count('1') <= self.max_hamming:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return emb, fingerprint
+            self.misses += 1
+        return None, fingerprint
+
+    def put(self, fingerprint, box, embedding):
+        with self.lock:
+            self.entries[self._next_key] = (fingerprint, self._box_key(box), embedding, time.time())
+            self._next_key += 1
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expired': self.expired,
+            'size': len(self.entries),
+        }
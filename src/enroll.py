@@ -0,0 +1,124 @@
+# src/enroll.py
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from core.config import ENROLL_WORKERS, ENROLL_BATCH_SIZE
+from src.alignment import align_face
+from src.offline import IMAGE_EXTENSIONS
+
+def collect_people(source):
+    """
+    {name: [image paths]} from either
+      - a folder with one sub-folder per person (folder name = user name), or
+      - a CSV manifest with 'name' and 'image' columns (relative paths resolve against the CSV's folder).
+    """
+    people = {}
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            folder = os.path.join(source, name)
+            if not os.path.isdir(folder):
+                continue
+            paths = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+            if paths:
+                people[name] = paths
+        return people
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name = (row.get('name') or '').strip()
+            image = (row.get('image') or '').strip()
+            if name and image:
+                people.setdefault(name, []).append(os.path.join(base, image))
+    return people
+
+# --- Worker side (one RetinaFace per process) ---
+
+_detector = None
+
+def _init_worker():
+    global _detector
+    from src.detector import FaceDetector
+    _detector = FaceDetector(roi_only=False)
+    _detector.load()
+
+def detect_and_align(path):
+    """
+    Largest face in one photo, aligned to 160x160.
+    Returns (crop, None) or (None, reason). Intent checks do not apply to badge photos.
+    """
+    if _detector is None:
+        _init_worker()
+    image = cv2.imread(path)
+    if image is None:
+        return None, 'unreadable'
+    faces = _detector.detect(image)
+    if not isinstance(faces, dict) or not faces:
+        return None, 'no face'
+
+    def area(face):
+        x1, y1, x2, y2 = face['facial_area']
+        return (x2 - x1) * (y2 - y1)
+
+    crop = align_face(image, max(faces.values(), key=area))
+    if crop is None:
+        return None, 'alignment failed'
+    return crop, None
+
+# --- Main process ---
+
+def enroll(source, recognizer, workers=ENROLL_WORKERS, batch_size=ENROLL_BATCH_SIZE):
+    """
+    Bulk registration: detection + alignment in a process pool, FaceNet in batches of
+    `batch_size` crops here, then every new user committed with one register_faces() call.
+    Returns a summary dict.
+    """
+    import torch
+
+    people = collect_people(source)
+    todo = {name: paths for name, paths in people.items() if not recognizer.check_name_exists(name)}
+    jobs = [(name, path) for name, paths in todo.items() for path in paths]
+    summary = {'people': len(people), 'existing': len(people) - len(todo), 'images': len(jobs),
+               'failed_images': 0, 'no_usable_image': 0, 'enrolled': 0}
+    print(f"Enrolling {len(todo)} people from {len(jobs)} images "
+          f"({summary['existing']} already registered, skipped)...")
+
+    samples = {}  # {name: [(1, 512) embeddings]}
+    pending = []  # (name, crop) awaiting a batched forward pass
+
+    def flush():
+        embs = recognizer.embed_crops([crop for _, crop in pending])
+        for row, (name, _) in enumerate(pending):
+            samples.setdefault(name, []).append(embs[row:row + 1])
+        pending.clear()
+
+    def consume(results):
+        for i, ((name, path), (crop, reason)) in enumerate(zip(jobs, results), 1):
+            if crop is None:
+                summary['failed_images'] += 1
+                print(f"[SKIP] {path}: {reason}")
+            else:
+                pending.append((name, crop))
+                if len(pending) >= batch_size:
+                    flush()
+            if i % 100 == 0:
+                print(f"  {i}/{len(jobs)} images")
+        if pending:
+            flush()
+
+    paths = [path for _, path in jobs]
+    if workers > 0 and paths:
+        # Spawned, not forked: forking a process that already holds torch threads can deadlock
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+            consume(pool.map(detect_and_align, paths, chunksize=4))
+    else:
+        consume(map(detect_and_align, paths))
+
+    names = [name for name in todo if name in samples]
+    summary['no_usable_image'] = len(todo) - len(names)
+    means = [torch.cat(samples[name], dim=0).mean(dim=0, keepdim=True) for name in names]
+    summary['enrolled'] = len(recognizer.register_faces(names, means))
+    return summary
@@ -0,0 +1,157 @@
+# src/face_db.py
+import csv
+import hashlib
+import io
+import os
+import numpy as np
+from core.config import DB_PATH, DB_INDEX_PATH, DB_MATRIX_PATH
+
+EMBEDDING_DIM = 512
+
+def entry_name(key, user_data):
+    """Display name of a face DB entry (legacy non-dict entries are keyed by name)."""
+    if isinstance(user_data, dict):
+        return user_data.get('name')
+    return key
+
+def write_index(rows, path=DB_INDEX_PATH):
+    """
+    Writes the key/name sidecar from [(key, name), ...], in DB order. Written atomically.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter='\t')
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+def read_index(path=DB_INDEX_PATH):
+    """
+    Returns [(key, name), ...] from the sidecar, or None if it does not exist.
+    A torn last line (crash mid-append) is ignored.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, newline='', encoding='utf-8') as f:
+        text = f.read()
+    if text and not text.endswith('\n'):
+        text = text[:text.rfind('\n') + 1]
+    return [(row[0], row[1]) for row in csv.reader(io.StringIO(text), delimiter='\t') if len(row) == 2]
+
+def gallery_fingerprint(keys):
+    """
+    Identifies the first len(keys) gallery rows, so an index persisted for them
+    can tell it was built for a different database with the same row count.
+    """
+    digest = hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+    return f"{len(keys)}:{digest}"
+
+def registered_names():
+    """
+    Names in the face DB without loading any model. Only falls back to torch
+    for a pickled DB that has not been migrated to the matrix format yet.
+    """
+    index = read_index()
+    if index is None and os.path.exists(DB_PATH):
+        import torch
+        return {entry_name(key, data) for key, data in torch.load(DB_PATH).items()}
+    return {name for _, name in index or []}
+
+class FaceStore:
+    """
+    Append-only face DB: a headerless float32 (N, 512) matrix at DB_MATRIX_PATH,
+    memory-mapped on load, plus the key/name sidecar at DB_INDEX_PATH (row i <-> line i).
+    Registering a user appends one row and one line; nothing is rewritten.
+    """
+
+    def __init__(self, matrix_path=DB_MATRIX_PATH, index_path=DB_INDEX_PATH, dim=EMBEDDING_DIM):
+        self.matrix_path = matrix_path
+        self.index_path = index_path
+        self.dim = dim
+        self.count = 0        # Rows present in both files
+        self.loaded = False   # count is only valid after load() / write()
+
+    @property
+    def row_bytes(self):
+        return self.dim * 4
+
+    def exists(self):
+        return os.path.exists(self.matrix_path)
+
+    def load(self):
+        """
+        Returns (keys, names, matrix). `matrix` is a copy-on-write memmap of the
+        embedding file, so pages are read lazily and the file is never modified.
+        Rows without an index line (or vice versa) from an interrupted append are dropped.
+        """
+        index = read_index(self.index_path) or []
+        rows = os.path.getsize(self.matrix_path) // self.row_bytes if self.exists() else 0
+        self.count = min(rows, len(index))
+        self.loaded = True
+        index = index[:self.count]
+
+        if self.count:
+            matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='c', shape=(self.count, self.dim))
+        else:
+            matrix = np.empty((0, self.dim), dtype=np.float32)
+        return [key for key, _ in index], [name for _, name in index], matrix
+
+    def append(self, keys, names, embeddings):
+        """
+        Appends len(keys) users. `embeddings` is an (M, dim) float array.
+        The matrix is written (and fsync'd) before the index, so a crash
+        leaves at most an orphan row, which the next load ignores.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        if len(keys) != len(embeddings) or len(names) != len(embeddings):
+            raise ValueError("keys, names and embeddings must have the same length")
+        if not len(embeddings):
+            return
+        if not self.loaded:
+            # count decides where the matrix is truncated; never guess it
+            self.load()
+
+        # 1. Matrix: drop any orphan rows past the index, then append
+        with open(self.matrix_path, 'ab') as f:
+            if os.path.getsize(self.matrix_path) != self.count * self.row_bytes:
+                # Only when needed: Windows cannot resize a file the gallery still has mapped
+                f.truncate(self.count * self.row_bytes)
+            f.write(embeddings.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 2. Index: drop a torn last line, then append
+        self._trim_index()
+        with open(self.index_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter='\t')
+            for key, name in zip(keys, names):
+                writer.writerow([key, name])
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(embeddings)
+
+    def _trim_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        size = os.path.getsize(self.index_path)
+        with open(self.index_path, 'rb+') as f:
+            # Only the tail is read; one line is far shorter than 64 KB
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail and not tail.endswith(b'\n'):
+                f.truncate(size - len(tail) + tail.rfind(b'\n') + 1)
+
+    def write(self, keys, names, embeddings):
+        """
+        Replaces the whole store (used by the migration). The matrix is renamed
+        into place last, so an interrupted write leaves no store behind.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        tmp_path = self.matrix_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(embeddings.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        write_index(zip(keys, names), self.index_path)
+        os.replace(tmp_path, self.matrix_path)
+        self.count = len(embeddings)
+        self.loaded = True
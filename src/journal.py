@@ -0,0 +1,197 @@
+# src/journal.py
+import csv
+import os
+from datetime import datetime
+from core.config import JOURNAL_PATH, JOURNAL_FSYNC, LOG_PATH, CSV_COLUMNS
+
+JOURNAL_COLUMNS = ['Timestamp', 'Name', 'Action']
+
+class PunchJournal:
+    """
+    Append-only punch event log: one CSV line per punch, flushed (and fsync'd) on write,
+    so a punch costs O(1) regardless of history size.
+    The Name/Date/Punch In/Punch Out table at LOG_PATH is a view materialized from it.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, fsync=JOURNAL_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._writer = None
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def _open(self):
+        if self._file is None:
+            self._trim_tail()
+            is_new = not self.exists()
+            self._file = open(self.path, 'a', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            if is_new:
+                self._writer.writerow(JOURNAL_COLUMNS)
+                self._sync()
+
+    def _trim_tail(self):
+        """Drops a torn last line (crash mid-write) so the next append starts on a fresh line."""
+        if not os.path.exists(self.path):
+            return
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb+') as f:
+            # Only the tail is read; one event is far shorter than 64 KB
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail and not tail.endswith(b'\n'):
+                f.truncate(size - len(tail) + tail.rfind(b'\n') + 1)
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, name, time, action):
+        """Writes one punch event ('PUNCH IN' / 'PUNCH OUT')."""
+        self._open()
+        self._writer.writerow([time.isoformat(timespec='seconds'), name, action])
+        self._sync()
+
+    def append_many(self, events, fsync=None):
+        """
+        Writes several (name, time, action) events with one flush and at most one fsync.
+        `fsync` overrides the journal's own setting for this write.
+        All or nothing: if the write fails, the journal is cut back to where it was,
+        so the caller can retry the whole batch without duplicating rows.
+        """
+        self._open()
+        self._file.flush()
+        start = os.fstat(self._file.fileno()).st_size
+        try:
+            self._writer.writerows([[time.isoformat(timespec='seconds'), name, action] for name, time, action in events])
+            self._file.flush()
+            if self.fsync if fsync is None else fsync:
+                os.fsync(self._file.fileno())
+        except Exception:
+            self._rollback(start)
+            raise
+
+    def _rollback(self, size):
+        """Drops everything past byte `size` after a failed write; the file is reopened on the next append."""
+        try:
+            self._file.close()
+        except Exception:
+            pass  # Buffered rows that cannot be flushed are cut below anyway
+        self._file = None
+        self._writer = None
+        os.truncate(self.path, size)
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def events(self, offset=0):
+        """
+        Yields (next_offset, timestamp, name, action) for every complete event
+        starting at byte `offset`, oldest first. `next_offset` is where reading
+        should resume after that event. A torn last line (crash mid-write) and
+        rows with an unparseable timestamp are skipped.
+        """
+        if not self.exists():
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                offset += len(raw)
+                row = next(csv.reader([raw.decode('utf-8')]), None)
+                if not row or row == JOURNAL_COLUMNS or len(row) != 3:
+                    continue
+                try:
+                    time = datetime.fromisoformat(row[0])
+                except ValueError:
+                    continue
+                yield offset, time, row[1], row[2]
+
+    def replay(self, offset=0):
+        """Yields (timestamp, name, action) for every complete event, oldest first."""
+        for _, time, name, action in self.events(offset):
+            yield time, name, action
+
+    def punches_since(self, offset=0):
+        """
+        (events, next_offset) for every complete punch from byte `offset` on, where each
+        event is (position, timestamp, name, action) and position is where its line starts
+        (or a skipped line just before it). Resume from next_offset.
+        Returns None if `offset` is past the end (journal replaced or truncated).
+        """
+        if offset > self.size():
+            return None
+        events = []
+        position = offset
+        for next_offset, time, name, action in self.events(offset):
+            events.append((position, time, name, action))
+            position = next_offset
+        return events, position
+
+    def records(self, start_date=None, end_date=None, name=None):
+        """
+        Table rows (CSV_COLUMNS lists) with start_date <= Date <= end_date
+        ('YYYY-MM-DD', either bound optional), optionally for one name.
+        Same rules as materialize(); scans the whole journal.
+        """
+        start_date = str(start_date) if start_date is not None else None
+        end_date = str(end_date) if end_date is not None else None
+        rows = {}  # (name, date) -> row, in first-seen order
+        for time, row_name, action in self.replay():
+            date = time.strftime('%Y-%m-%d')
+            if (name is not None and row_name != name) or (start_date is not None and date < start_date) \
+                    or (end_date is not None and date > end_date):
+                continue
+            row = rows.setdefault((row_name, date), [row_name, date, '', ''])
+            if action == "PUNCH IN":
+                row[2] = time.strftime('%H:%M:%S')
+            else:
+                row[3] = time.strftime('%H:%M:%S')
+        return list(rows.values())
+
+    def import_table(self, csv_path=LOG_PATH):
+        """
+        Seeds an empty journal from an existing Name/Date/Punch In/Punch Out table,
+        emitting one IN and/or OUT event per row in file order.
+        Returns the number of events written.
+        """
+        count = 0
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                for column, action in (('Punch In Time', 'PUNCH IN'), ('Punch Out Time', 'PUNCH OUT')):
+                    value = (row.get(column) or '').strip()
+                    if not value:
+                        continue
+                    time = datetime.strptime(f"{row['Date']} {value}", '%Y-%m-%d %H:%M:%S')
+                    self._open()
+                    self._writer.writerow([time.isoformat(timespec='seconds'), row['Name'], action])
+                    count += 1
+        if self._file is not None:
+            self._sync()
+        return count
+
+    def materialize(self, csv_path=LOG_PATH):
+        """
+        Rebuilds the Name/Date/Punch In/Punch Out table from the journal.
+        Same rules as the old in-place CSV update: one row per (Name, Date),
+        the latest IN / OUT of the day wins. Written atomically.
+        """
+        rows = self.records()
+        tmp_path = csv_path + '.tmp'
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(rows)
+        os.replace(tmp_path, csv_path)
+        return len(rows)
+
+    def close(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+            self._writer = None
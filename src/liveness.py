@@ -3,6 +3,7 @@ import cv2
 import numpy as np
 from collections import deque
 from core.config import BLINK_THRESHOLD, BLINK_FRAMES, HEAD_POSE_THRESHOLD, LIVENESS_CHALLENGE_TIMEOUT
+from core.config import LIVENESS_CHALLENGES, LIVENESS_WINDOW, LIVENESS_IDLE_SECONDS
 import time
 import random
 
@@ -316,4 +317,147 @@ class LivenessDetector:
         self.challenge_passed = False
         self.blink_history.clear()
         self.blink_counter = 0
-        self.failed_attempts = 0
\ No newline at end of file
+        self.failed_attempts = 0
+
+CHALLENGE_PROMPTS = {'blink': "Blink", 'look_left': "Look Left", 'look_right': "Look Right"}
+
+class LivenessEngine:
+    """
+    Liveness for every tracked face at once.
+    Per-track EAR / head-turn history lives in fixed-size ring buffers: rows of
+    preallocated arrays, keyed by track id, recycled when a track goes idle.
+    Each frame's faces are measured in one vectorized pass.
+
+    RetinaFace gives one point per eye, so EAR (and the blink challenge) is only
+    available when 6-point eye contours are present; head turn works from eye centres.
+    """
+
+    def __init__(self, window=LIVENESS_WINDOW, idle_seconds=LIVENESS_IDLE_SECONDS,
+                 challenges=LIVENESS_CHALLENGES, capacity=32):
+        self.window = max(window, BLINK_FRAMES)
+        self.idle_seconds = idle_seconds
+        self.challenges = list(challenges)
+        self.ear = np.full((capacity, self.window), np.nan, dtype=np.float32)
+        self.yaw = np.full((capacity, self.window), np.nan, dtype=np.float32)
+        self.head = np.zeros(capacity, dtype=np.int64)   # Next write position per row
+        self.count = np.zeros(capacity, dtype=np.int64)  # Valid samples per row
+        self.last_seen = np.zeros(capacity)
+        self.slots = {}  # {track_id: row}
+        self.free = list(range(capacity - 1, -1, -1))
+        self.state = {}  # {track_id: {'challenge', 'started', 'passed'}}
+
+    def _grow(self):
+        capacity = self.ear.shape[0]
+        self.ear = np.vstack([self.ear, np.full_like(self.ear, np.nan)])
+        self.yaw = np.vstack([self.yaw, np.full_like(self.yaw, np.nan)])
+        self.head = np.concatenate([self.head, np.zeros_like(self.head)])
+        self.count = np.concatenate([self.count, np.zeros_like(self.count)])
+        self.last_seen = np.concatenate([self.last_seen, np.zeros_like(self.last_seen)])
+        self.free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def _slot(self, track_id):
+        slot = self.slots.get(track_id)
+        if slot is None:
+            if not self.free:
+                self._grow()
+            slot = self.free.pop()
+            self.ear[slot] = np.nan
+            self.yaw[slot] = np.nan
+            self.head[slot] = 0
+            self.count[slot] = 0
+            self.slots[track_id] = slot
+        return slot
+
+    @staticmethod
+    def measure(landmarks_list):
+        """
+        EAR and nose position between the eyes (0 = left eye, 1 = right eye) for F faces.
+        Returns two (F,) arrays; NaN where a signal is unavailable.
+        """
+        count = len(landmarks_list)
+        eyes = np.full((count, 2, 6, 2), np.nan, dtype=np.float32)  # 6-point contours
+        centres = np.full((count, 2, 2), np.nan, dtype=np.float32)
+        nose = np.full((count, 2), np.nan, dtype=np.float32)
+        for i, landmarks in enumerate(landmarks_list):
+            for e, key in enumerate(('left_eye', 'right_eye')):
+                points = landmarks.get(key)
+                if points is None:
+                    continue
+                if len(points) == 12:
+                    eyes[i, e] = np.reshape(points, (6, 2))
+                    centres[i, e] = eyes[i, e].mean(axis=0)
+                elif len(points) == 2:
+                    centres[i, e] = points
+            if len(landmarks.get('nose', ())) == 2:
+                nose[i] = landmarks['nose']
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # EAR = (|p1 - p5| + |p2 - p4|) / (2 |p0 - p3|), averaged over both eyes
+            vertical = (np.linalg.norm(eyes[:, :, 1] - eyes[:, :, 5], axis=-1) +
+                        np.linalg.norm(eyes[:, :, 2] - eyes[:, :, 4], axis=-1))
+            horizontal = np.linalg.norm(eyes[:, :, 0] - eyes[:, :, 3], axis=-1)
+            ear = (vertical / (2.0 * horizontal)).mean(axis=1)
+            yaw = (nose[:, 0] - centres[:, 0, 0]) / (centres[:, 1, 0] - centres[:, 0, 0])
+        ear[~np.isfinite(ear)] = np.nan
+        yaw[~np.isfinite(yaw)] = np.nan
+        return ear, yaw
+
+    def update(self, faces, now):
+        """
+        Records one sample per face and advances each face's challenge.
+        `faces` is [(track_id, landmarks), ...] for faces detected in this frame;
+        `now` is a timestamp in seconds. Returns {track_id: (passed, message)}.
+        """
+        if not faces:
+            return {}
+        track_ids = [track_id for track_id, _ in faces]
+        ear, yaw = self.measure([landmarks for _, landmarks in faces])
+
+        # 1. Write into the ring buffers
+        slots = np.array([self._slot(track_id) for track_id in track_ids])
+        pos = self.head[slots]
+        self.ear[slots, pos] = ear
+        self.yaw[slots, pos] = yaw
+        self.head[slots] = (pos + 1) % self.window
+        self.count[slots] = np.minimum(self.count[slots] + 1, self.window)
+        self.last_seen[slots] = now
+
+        # 2. Blink: the last BLINK_FRAMES samples hold both closed and open eyes
+        recent = (self.head[slots, None] - 1 - np.arange(BLINK_FRAMES)) % self.window
+        samples = self.ear[slots[:, None], recent]
+        complete = (self.count[slots] >= BLINK_FRAMES) & ~np.isnan(samples).any(axis=1)
+        with np.errstate(invalid='ignore'):
+            closed = samples < BLINK_THRESHOLD
+            blink = complete & closed.any(axis=1) & ~closed.all(axis=1)
+
+            # 3. Head turn from the latest sample (NaN compares False -> centre)
+            turned_left = yaw < 0.5 - HEAD_POSE_THRESHOLD
+            turned_right = yaw > 0.5 + HEAD_POSE_THRESHOLD
+
+        results = {}
+        for i, track_id in enumerate(track_ids):
+            signals = {'blink': blink[i], 'look_left': turned_left[i], 'look_right': turned_right[i]}
+            results[track_id] = self._advance(track_id, signals, not np.isnan(ear[i]), now)
+        return results
+
+    def _advance(self, track_id, signals, has_ear, now):
+        state = self.state.get(track_id)
+        if state is None or (not state['passed'] and now - state['started'] > LIVENESS_CHALLENGE_TIMEOUT):
+            choices = [c for c in self.challenges if c in CHALLENGE_PROMPTS and (c != 'blink' or has_ear)]
+            state = {'challenge': random.choice(choices or ['look_left', 'look_right']),
+                     'started': now, 'passed': False}
+            self.state[track_id] = state
+
+        if not state['passed'] and signals[state['challenge']]:
+            state['passed'] = True
+        if state['passed']:
+            return True, "Live"
+        return False, f"{CHALLENGE_PROMPTS[state['challenge']]} ({int(now - state['started'])}s)"
+
+    def evict(self, now):
+        """Frees the rows of tracks not seen for idle_seconds."""
+        for track_id, slot in list(self.slots.items()):
+            if now - self.last_seen[slot] > self.idle_seconds:
+                del self.slots[track_id]
+                self.state.pop(track_id, None)
+                self.free.append(slot)
@@ -0,0 +1,170 @@
+# src/metrics.py
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from core.config import METRICS_ENABLED, METRICS_OVERLAY, METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL
+
+PREFIX = "face_attendance"
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+class Histogram:
+    """Cumulative-bucket latency histogram plus a window of recent samples for live percentiles."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=256)
+
+    def observe(self, ms):
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.recent.append(ms)
+
+    def percentile(self, pct):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class Metrics:
+    """
+    Runtime instrumentation: per-stage latency histograms, event counters and loop FPS.
+    Thread-safe; shared by the pipeline workers.
+    """
+
+    enabled = True
+
+    def __init__(self, dump_path=METRICS_DUMP_PATH, dump_interval=METRICS_DUMP_INTERVAL, overlay=METRICS_OVERLAY):
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.overlay = overlay
+        self.histograms = {}  # {stage: Histogram}
+        self.counters = {}    # {event: int}
+        self.ticks = {}       # {loop: deque of tick times}
+        self.lock = threading.Lock()
+        self.last_dump = time.time()
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+    def observe(self, stage, ms):
+        with self.lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(ms)
+
+    def inc(self, event, n=1):
+        with self.lock:
+            self.counters[event] = self.counters.get(event, 0) + n
+
+    def tick(self, loop):
+        """Marks one iteration of a loop ('render', 'process', ...) for FPS."""
+        with self.lock:
+            if loop not in self.ticks:
+                self.ticks[loop] = deque(maxlen=120)
+            self.ticks[loop].append(time.perf_counter())
+
+    def fps(self, loop):
+        ticks = self.ticks.get(loop)
+        if not ticks or len(ticks) < 2 or ticks[-1] == ticks[0]:
+            return 0.0
+        return (len(ticks) - 1) / (ticks[-1] - ticks[0])
+
+    def unknown_rate(self):
+        recognized = self.counters.get('faces_recognized', 0)
+        return self.counters.get('unknown', 0) / recognized if recognized else 0.0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'stages_ms': {stage: {'count': h.count, 'mean': h.total / h.count if h.count else 0.0,
+                                      'p50': h.percentile(50), 'p95': h.percentile(95),
+                                      'buckets': dict(zip([str(b) for b in BUCKETS_MS] + ['+Inf'], h.buckets))}
+                              for stage, h in self.histograms.items()},
+                'counters': dict(self.counters),
+                'fps': {loop: self.fps(loop) for loop in self.ticks},
+                'unknown_rate': self.unknown_rate(),
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            lines.append(f"# TYPE {PREFIX}_stage_latency_ms histogram")
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(list(BUCKETS_MS) + ['+Inf'], h.buckets):
+                    cumulative += count
+                    lines.append(f'{PREFIX}_stage_latency_ms_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{PREFIX}_stage_latency_ms_sum{{stage="{stage}"}} {h.total:.3f}')
+                lines.append(f'{PREFIX}_stage_latency_ms_count{{stage="{stage}"}} {h.count}')
+            lines.append(f"# TYPE {PREFIX}_events_total counter")
+            for event, value in sorted(self.counters.items()):
+                lines.append(f'{PREFIX}_events_total{{event="{event}"}} {value}')
+            lines.append(f"# TYPE {PREFIX}_fps gauge")
+            for loop in sorted(self.ticks):
+                lines.append(f'{PREFIX}_fps{{loop="{loop}"}} {self.fps(loop):.2f}')
+            lines.append(f"# TYPE {PREFIX}_unknown_ratio gauge")
+            lines.append(f"{PREFIX}_unknown_ratio {self.unknown_rate():.4f}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=None):
+        """Writes Prometheus text (or JSON for *.json paths) atomically."""
+        path = path or self.dump_path
+        body = json.dumps(self.snapshot(), indent=2) if path.endswith('.json') else self.to_prometheus()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        self.last_dump = time.time()
+
+    def maybe_dump(self):
+        if time.time() - self.last_dump >= self.dump_interval:
+            self.dump()
+
+    def draw_overlay(self, frame):
+        if not self.overlay:
+            return
+        import cv2
+        snap = self.snapshot()
+        lines = [f"FPS render {snap['fps'].get('render', 0):.1f}  process {snap['fps'].get('process', 0):.1f}"]
+        for stage, s in sorted(snap['stages_ms'].items()):
+            lines.append(f"{stage:<12} p50 {s['p50']:6.1f}ms  p95 {s['p95']:6.1f}ms")
+        c = snap['counters']
+        lines.append(f"faces {c.get('faces_detected', 0)} acc {c.get('faces_accepted', 0)} "
+                     f"rec {c.get('faces_recognized', 0)} unk {snap['unknown_rate']:.0%}")
+        x = frame.shape[1] - 330
+        for i, text in enumerate(lines):
+            cv2.putText(frame, text, (x, 20 + 18 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+
+class NullMetrics:
+    """Disabled instrumentation: every call is a no-op."""
+
+    enabled = False
+    _null = nullcontext()
+
+    def time(self, stage):
+        return self._null
+
+    def observe(self, stage, ms): pass
+    def inc(self, event, n=1): pass
+    def tick(self, loop): pass
+    def dump(self, path=None): pass
+    def maybe_dump(self): pass
+    def draw_overlay(self, frame): pass
+
+    def snapshot(self):
+        return {}
+
+# Process-wide instance used by the pipeline, recognizer and attendance manager
+metrics = Metrics() if METRICS_ENABLED else NullMetrics()
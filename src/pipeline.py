@@ -0,0 +1,255 @@
+# src/pipeline.py
+import queue
+import threading
+from datetime import datetime
+import cv2
+from core.config import DETECT_WORKERS, RECOGNIZE_WORKERS, PIPELINE_QUEUE_SIZE, QUALITY_ENABLED
+from src.metrics import metrics
+from src.quality import REASONS, check_quality
+
+class DropOldestQueue(queue.Queue):
+    """
+    Bounded queue whose put() never blocks: when full, the oldest item is discarded,
+    so a slow consumer always sees the most recent work.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                super().put(item, block=False)
+                return
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+# --- Stages (shared by the threaded pipeline and serial callers) ---
+
+def detect_faces(detector, tracker, frame, lock=None, now=None, liveness=None):
+    """
+    Detection + intent stage. Runs RetinaFace only when the tracker asks for it.
+    `now` (datetime) is the frame time; defaults to the wall clock.
+    With a LivenessEngine, freshly detected tracks also advance their liveness challenge.
+    Returns a list of (track, face_data, valid_intent, msg, needs_recognition).
+    """
+    lock = lock or threading.Lock()
+    with lock:
+        run_detection = tracker.start_frame()
+    faces = None
+    if run_detection:
+        with metrics.time('detect'):
+            faces = detector.detect(frame)
+        metrics.inc('detections')
+        metrics.inc('faces_detected', len(faces) if isinstance(faces, dict) else 0)
+
+    now = (now or datetime.now()).timestamp()
+    items = []
+    with lock:
+        if run_detection:
+            tracker.update(faces)
+            if liveness is not None:
+                with metrics.time('liveness'):
+                    fresh = {track.id: track for track in tracker.active() if track.fresh}
+                    checks = liveness.update([(track_id, track.face_data['landmarks'])
+                                              for track_id, track in fresh.items()], now)
+                    for track_id, (live, msg) in checks.items():
+                        fresh[track_id].live, fresh[track_id].liveness_msg = live, msg
+                    liveness.evict(now)
+        with metrics.time('intent'):
+            for track in tracker.active():
+                face_data = track.face_data
+                valid_intent, msg = detector.verify_intent(face_data, frame.shape[1], frame.shape[0])
+                needs = valid_intent and track.needs_recognition(now)
+                items.append((track, face_data, valid_intent, msg, needs))
+    if run_detection:
+        metrics.inc('faces_accepted', sum(1 for item in items if item[2]))
+    return items
+
+def recognize_faces(recognizer, manager, frame, items, lock=None, now=None, embed=None):
+    """
+    Recognition + punch stage. Tracks that need it pass the quality gate (when
+    QUALITY_ENABLED) and are embedded in one batched forward pass; the rest reuse
+    their cached identity.
+    `now` (datetime) is the frame time used for punches; defaults to the wall clock.
+    `embed` overrides the forward pass (see FaceRecognizer.get_embeddings).
+    Returns one result dict per face for drawing / logging.
+    """
+    lock = lock or threading.Lock()
+    now = now or datetime.now()
+    pending = [i for i, item in enumerate(items) if item[4]]
+    rejected = {}  # {item index: reason} for crops not worth a FaceNet pass
+    if pending and QUALITY_ENABLED:
+        with metrics.time('quality'):
+            for i in pending:
+                ok, reason = check_quality(frame, items[i][1])
+                if not ok:
+                    rejected[i] = reason
+                    metrics.inc('quality_rejected')
+                    metrics.inc(f'quality_rejected_{reason}')
+        pending = [i for i in pending if i not in rejected]
+    embedded, identities = [], []
+    if pending:
+        with metrics.time('embed'):
+            embs = recognizer.get_embeddings(frame, [items[i][1] for i in pending], embed)
+        embedded = [(i, emb) for i, emb in zip(pending, embs) if emb is not None]
+        with metrics.time('identify'):
+            identities = recognizer.identify_batch([emb for _, emb in embedded])
+        metrics.inc('faces_recognized', len(identities))
+        metrics.inc('unknown', sum(1 for name, _ in identities if name == "Unknown"))
+
+    results = []
+    with lock:
+        for (i, _), (name, dist) in zip(embedded, identities):
+            items[i][0].set_identity(name, dist, now.timestamp())
+        recognized = {i for i, _ in embedded}
+
+        for i, (track, face_data, valid_intent, msg, _) in enumerate(items):
+            result = {'track_id': track.id, 'box': face_data['facial_area'], 'valid': valid_intent,
+                      'msg': msg, 'recognized': i in recognized, 'name': None, 'dist': None,
+                      'status': None, 'action': None, 'time': None}
+            if i in rejected and track.name is None:
+                result['valid'], result['msg'] = False, REASONS[rejected[i]]
+            elif valid_intent and track.name is not None:
+                result['name'], result['dist'] = track.name, track.dist
+                if track.name != "Unknown" and track.live is False:
+                    result['status'], result['msg'] = "Liveness", track.liveness_msg
+                    metrics.inc('liveness_pending')
+                elif track.name != "Unknown":
+                    with metrics.time('punch'):
+                        result['status'], result['action'] = manager.process_punch(track.name, now)
+                    result['time'] = now
+                    if result['status'] == "Success":
+                        metrics.inc('punches')
+            results.append(result)
+    return results
+
+def draw_results(frame, results):
+    """Draws boxes and punch messages exactly as the serial run loop did."""
+    for result in results:
+        box = result['box']
+        color = (0, 0, 255)  # Red by default
+
+        if result['valid']:
+            color = (0, 255, 255)  # Yellow (Processing)
+            name = result['name']
+            if name is not None and name != "Unknown":
+                color = (0, 255, 0)  # Green
+                if result['status'] == "Success":
+                    time_str = result['time'].strftime('%d-%b %H:%M:%S')
+                    cv2.putText(frame, f"{name}: {result['action']}", (box[0], box[1]-30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+                    cv2.putText(frame, f"at {time_str}", (box[0], box[1]-10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 255, 200), 1)
+                elif result['status'] == "Liveness":
+                    cv2.putText(frame, f"{name}: {result['msg']}", (box[0], box[1]-20),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2)
+                else:
+                    cv2.putText(frame, f"{name}: Wait...", (box[0], box[1]-20),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+            elif name == "Unknown":
+                cv2.putText(frame, "Unknown", (box[0], box[1]-10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+
+        # Draw Face Box
+        cv2.rectangle(frame, (box[0], box[1]), (box[2], box[3]), color, 2)
+        if not result['valid']:
+            cv2.putText(frame, result['msg'], (box[0], box[1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+
+# --- Threaded run mode ---
+
+class RunPipeline:
+    """
+    Run mode as concurrent stages joined by drop-oldest queues:
+    capture thread -> detection workers -> recognition workers -> render (caller's thread).
+    The renderer always shows the newest captured frame with the newest results,
+    so a slow stage lowers result rate, not display FPS.
+    """
+
+    def __init__(self, cap, detector, recognizer, manager, tracker,
+                 detect_workers=DETECT_WORKERS, recognize_workers=RECOGNIZE_WORKERS,
+                 queue_size=PIPELINE_QUEUE_SIZE, liveness=None):
+        self.cap = cap
+        self.detector = detector
+        self.recognizer = recognizer
+        self.manager = manager
+        self.tracker = tracker
+        self.liveness = liveness
+        self.detect_workers = max(1, detect_workers)
+        self.recognize_workers = max(1, recognize_workers)
+
+        self.detect_queue = DropOldestQueue(queue_size)
+        self.recognize_queue = DropOldestQueue(queue_size)
+        self.stop_event = threading.Event()
+        self.state_lock = threading.Lock()  # Guards tracker, track identities and punches
+        self.latest_lock = threading.Lock()
+        self.threads = []
+
+        self.latest_frame = None      # (seq, frame) from capture
+        self.latest_results = (-1, [])  # (seq, results) from recognition
+
+    @property
+    def running(self):
+        return not self.stop_event.is_set()
+
+    def start(self):
+        workers = [self._capture_loop]
+        workers += [self._detect_loop] * self.detect_workers
+        workers += [self._recognize_loop] * self.recognize_workers
+        for target in workers:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Waits for every worker, so no recognition can punch after the manager is closed."""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+
+    def latest(self):
+        """Returns (seq, frame, results) for the renderer; frame is None before the first capture."""
+        with self.latest_lock:
+            if self.latest_frame is None:
+                return -1, None, []
+            seq, frame = self.latest_frame
+            return seq, frame, self.latest_results[1]
+
+    def _capture_loop(self):
+        seq = 0
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.stop_event.set()
+                break
+            with self.latest_lock:
+                self.latest_frame = (seq, frame)
+            self.detect_queue.put((seq, frame))
+            seq += 1
+
+    def _detect_loop(self):
+        while self.running:
+            try:
+                seq, frame = self.detect_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            items = detect_faces(self.detector, self.tracker, frame, self.state_lock, liveness=self.liveness)
+            self.recognize_queue.put((seq, frame, items))
+
+    def _recognize_loop(self):
+        while self.running:
+            try:
+                seq, frame, items = self.recognize_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            results = recognize_faces(self.recognizer, self.manager, frame, items, self.state_lock)
+            metrics.tick('process')
+            with self.latest_lock:
+                # Workers may finish out of order; never go back to an older frame
+                if seq > self.latest_results[0]:
+                    self.latest_results = (seq, results)
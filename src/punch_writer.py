@@ -0,0 +1,96 @@
+# src/punch_writer.py
+import queue
+import threading
+import time
+from core.config import PUNCH_FLUSH_INTERVAL, PUNCH_FSYNC_POLICY, PUNCH_FSYNC_INTERVAL
+from src.metrics import metrics
+
+FSYNC_POLICIES = ('batch', 'interval', 'none')
+
+class PunchWriter:
+    """
+    Background journal writer. Punches are queued by the caller and written every
+    `flush_interval` seconds as one batch, so disk latency never blocks the camera loop.
+    `on_written(batch)` runs on the writer thread after each batch reaches the journal.
+    close() drains the queue before returning; punches submitted after it are written synchronously.
+    """
+
+    def __init__(self, journal, on_written=None, flush_interval=PUNCH_FLUSH_INTERVAL,
+                 fsync_policy=PUNCH_FSYNC_POLICY, fsync_interval=PUNCH_FSYNC_INTERVAL):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. Choose from: {', '.join(FSYNC_POLICIES)}")
+        self.journal = journal
+        self.on_written = on_written
+        self.flush_interval = flush_interval
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.queue = queue.Queue()
+        self.stop_event = threading.Event()
+        self.flush_lock = threading.Lock()
+        self.last_fsync = time.monotonic()
+        self.retry = []  # Batch whose write failed; written first next time
+        self.closed = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def submit(self, name, time, action):
+        """Queues one punch; returns immediately (writes it before returning once closed)."""
+        self.queue.put((name, time, action))
+        if self.closed:
+            self.flush()
+
+    def pending(self):
+        return self.queue.qsize() + len(self.retry)
+
+    def _should_fsync(self):
+        if self.fsync_policy == 'batch':
+            return True
+        if self.fsync_policy == 'interval' and time.monotonic() - self.last_fsync >= self.fsync_interval:
+            return True
+        return False
+
+    def flush(self):
+        """Writes everything queued so far as one batch."""
+        with self.flush_lock:
+            batch, self.retry = self.retry, []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return 0
+            fsync = self._should_fsync()
+            try:
+                with metrics.time('punch_write'):
+                    self.journal.append_many(batch, fsync=fsync)
+            except Exception:
+                # The journal rolled the partial batch back, so it is safe to rewrite in full
+                self.retry = batch
+                raise
+            if fsync:
+                self.last_fsync = time.monotonic()
+            metrics.inc('punch_batches')
+            if self.on_written is not None:
+                self.on_written(batch)
+            return len(batch)
+
+    def _loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # The batch is kept and retried on the next flush
+                print(f"Punch writer error: {e}")
+
+    def close(self):
+        """Stops the thread, then drains whatever is still queued."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.closed = True  # Set before the last flush: anything queued earlier is drained by it
+        self.flush()
@@ -0,0 +1,69 @@
+# src/quality.py
+import cv2
+import numpy as np
+from core.config import QUALITY_MIN_SHARPNESS, QUALITY_MAX_BRIGHT, QUALITY_MAX_DARK, QUALITY_MAX_ASYMMETRY
+
+QUALITY_SIZE = 96  # Crops are scored at a fixed size so thresholds do not depend on distance
+
+# Rejection reason -> on-screen hint
+REASONS = {
+    'blur': "Hold Still",
+    'bright': "Too Bright",
+    'dark': "Too Dark",
+    'asymmetry': "Face Covered",
+}
+
+def _imbalance(centre, a, b):
+    """|d(a) - d(b)| / (d(a) + d(b)) for two landmarks around `centre`; 0 when symmetric."""
+    da = np.hypot(a[0] - centre[0], a[1] - centre[1])
+    db = np.hypot(b[0] - centre[0], b[1] - centre[1])
+    return abs(da - db) / (da + db) if da + db > 0 else 0.0
+
+def face_quality(frame, face_data):
+    """
+    Cheap quality signals for one detected face:
+    sharpness (Laplacian variance), bright / dark (clipped histogram fractions)
+    and asymmetry (eyes and mouth corners around the nose). None for an empty box.
+    """
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = face_data['facial_area']
+    x1, y1, x2, y2 = max(0, int(x1)), max(0, int(y1)), min(w, int(x2)), min(h, int(y2))
+    if x2 <= x1 or y2 <= y1:
+        return None
+
+    gray = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+    gray = cv2.resize(gray, (QUALITY_SIZE, QUALITY_SIZE), interpolation=cv2.INTER_AREA)
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel() / gray.size
+
+    landmarks = face_data['landmarks']
+    asymmetry = 0.0
+    nose = landmarks.get('nose')
+    if nose is not None:
+        if 'left_eye' in landmarks and 'right_eye' in landmarks:
+            asymmetry = _imbalance(nose, landmarks['left_eye'], landmarks['right_eye'])
+        if 'mouth_left' in landmarks and 'mouth_right' in landmarks:
+            asymmetry = max(asymmetry, _imbalance(nose, landmarks['mouth_left'], landmarks['mouth_right']))
+
+    return {
+        'sharpness': float(cv2.Laplacian(gray, cv2.CV_32F).var()),
+        'bright': float(hist[250:].sum()),
+        'dark': float(hist[:6].sum()),
+        'asymmetry': float(asymmetry),
+    }
+
+def check_quality(frame, face_data):
+    """
+    Returns (ok, reason). `reason` is a REASONS key for the first failed check, else None.
+    """
+    scores = face_quality(frame, face_data)
+    if scores is None:
+        return True, None  # Nothing to score; alignment rejects empty boxes itself
+    if scores['sharpness'] < QUALITY_MIN_SHARPNESS:
+        return False, 'blur'
+    if scores['bright'] > QUALITY_MAX_BRIGHT:
+        return False, 'bright'
+    if scores['dark'] > QUALITY_MAX_DARK:
+        return False, 'dark'
+    if scores['asymmetry'] > QUALITY_MAX_ASYMMETRY:
+        return False, 'asymmetry'
+    return True, None
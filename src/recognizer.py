@@ -1,100 +1,93 @@
 # src/recognizer.py
 import torch
 import numpy as np
-import cv2
 import os
 from facenet_pytorch import InceptionResnetV1
-from core.config import DB_PATH, RECOGNITION_THRESHOLD
-from core.hashing import hash_name, name_exists
+from core.config import DB_PATH, DB_MATRIX_PATH, RECOGNITION_THRESHOLD, ANN_ENABLED, ANN_MIN_GALLERY, ANN_INDEX_PATH
+from core.config import EMBED_CACHE_ENABLED, FACENET_BACKEND, GALLERY_DTYPE, GALLERY_COMPRESSED_PATH
+from core.hashing import hash_name
+from src.ann_index import IVFIndex
+from src.compressed_gallery import CompressedGallery
+from src.embedding_cache import EmbeddingCache
+from src.face_db import FaceStore, gallery_fingerprint
+from src.backends import load_backend
+from src.alignment import align_face
 
 class FaceRecognizer:
-    def __init__(self):
+    def __init__(self, backend=FACENET_BACKEND):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         # Initialize FaceNet
         self.model = InceptionResnetV1(pretrained='vggface2').eval().to(self.device)
-        self.known_embeddings = {}
+        self.infer, self.backend = load_backend(backend, self.model, self.device)  # backend actually in use
+        self.store = FaceStore()
+        self.gallery = torch.empty((0, 512))  # (N, 512) contiguous matrix, memory-mapped from the store
+        self.gallery_keys = []                # Name hashes, parallel to gallery rows
+        self.gallery_names = []               # Parallel to gallery rows
+        self.name_set = set()                 # For O(1) duplicate-name checks
+        self.ann_index = None                 # IVFIndex when ANN_ENABLED and gallery is large
+        self.compressed = None                # CompressedGallery when GALLERY_DTYPE is float16 / int8
+        self.embedding_cache = EmbeddingCache() if EMBED_CACHE_ENABLED else None
         self.load_db()
 
-    def load_db(self):
-        if os.path.exists(DB_PATH):
-            try:
-                self.known_embeddings = torch.load(DB_PATH)
-                print(f"Loaded {len(self.known_embeddings)} users.")
-            except:
-                print("Database corrupted or empty. Starting fresh.")
-                self.known_embeddings = {}
-        else:
-            self.known_embeddings = {}
+    @classmethod
+    def from_gallery(cls, gallery, names, gallery_dtype='float32'):
+        """
+        Search-only recognizer over an in-memory (N, 512) gallery: no FaceNet weights,
+        no store and nothing persisted. search() / identify() work; embedding does not.
+        """
+        recognizer = cls.__new__(cls)
+        recognizer.store = None
+        recognizer.gallery = gallery
+        recognizer.gallery_keys = [hash_name(name) for name in names]
+        recognizer.gallery_names = list(names)
+        recognizer.name_set = set(names)
+        recognizer.ann_index = None
+        recognizer.compressed = None
+        if gallery_dtype != 'float32' and len(names):
+            recognizer.compressed = CompressedGallery(gallery_dtype)
+            recognizer.compressed.add(gallery)
+        recognizer.embedding_cache = None
+        return recognizer
 
-    def save_db(self):
-        torch.save(self.known_embeddings, DB_PATH)
-        print("Database saved.")
+    def warmup(self):
+        """Runs one dummy forward pass so the first real face is not slow."""
+        self.embed_crops([np.zeros((160, 160, 3), dtype=np.uint8)])
 
-    def get_embedding(self, frame, face_data):
+    def load_db(self):
+        if not self.store.exists() and os.path.exists(DB_PATH):
+            self.migrate_legacy_db()
+        self.map_gallery()
+        if self.gallery_names:
+            print(f"Loaded {len(self.gallery_names)} users.")
+        self.sync_ann_index()
+        self.sync_compressed_gallery()
+
+    def map_gallery(self):
         """
-        Aligns face, crops, standardizes, and returns embedding.
+        Memory-maps the store's embedding matrix as the gallery, so identify() works on
+        one contiguous (N, 512) tensor without unpickling or copying the whole DB.
         """
-        box = face_data['facial_area']
-        landmarks = face_data['landmarks']
+        keys, names, matrix = self.store.load()
+        self.gallery = torch.from_numpy(matrix)
+        self.gallery_keys = keys
+        self.gallery_names = names
+        self.name_set = set(names)
 
-        # 1. Alignment (Rotation based on eyes)
-        left_eye = landmarks['left_eye']
-        right_eye = landmarks['right_eye']
-        
-        dY = right_eye[1] - left_eye[1]
-        dX = right_eye[0] - left_eye[0]
-        angle = np.degrees(np.arctan2(dY, dX))
-        
-        # --- THE FIX IS HERE ---
-        # Explicitly cast to Python int() because OpenCV rejects NumPy int32/int64
-        center_x = int((box[0] + box[2]) / 2)
-        center_y = int((box[1] + box[3]) / 2)
-        center = (center_x, center_y)
-        
-        # Rotate whole frame
-        try:
-            M = cv2.getRotationMatrix2D(center, angle, 1.0)
-            rotated_frame = cv2.warpAffine(frame, M, (frame.shape[1], frame.shape[0]))
-        except Exception as e:
-            # Fallback if rotation fails (e.g. extreme coords)
-            print(f"Rotation failed: {e}")
-            rotated_frame = frame
-
-        # 2. Crop
-        # Ensure we don't crop outside image bounds
-        h, w = rotated_frame.shape[:2]
-        x1 = max(0, box[0])
-        y1 = max(0, box[1])
-        x2 = min(w, box[2])
-        y2 = min(h, box[3])
-        
-        face_img = rotated_frame[y1:y2, x1:x2]
-        
-        # 3. Preprocess
-        if face_img.size == 0: return None # Handle empty crops
-        
+    def migrate_legacy_db(self):
+        """
+        One-shot conversion of the pickled face_db.pt dict into the matrix store.
+        The old file is kept as face_db.pt.migrated.
+        """
         try:
-            face_img = cv2.resize(face_img, (160, 160))
+            known_embeddings = torch.load(DB_PATH)
         except:
-            return None 
-
-        face_img = np.float32(face_img)
-        face_img = (face_img - 127.5) / 128.0
-        face_tensor = torch.from_numpy(face_img).permute(2, 0, 1).unsqueeze(0).to(self.device)
-
-        # 4. Infer
-        with torch.no_grad():
-            emb = self.model(face_tensor).cpu()
-        return emb
-
-    def identify(self, embedding):
-        min_dist = 100
-        identity = "Unknown"
-        
-        if len(self.known_embeddings) == 0:
-            return "Unknown", 100
+            print("Database corrupted or empty. Starting fresh.")
+            return
 
-        for hash_key, user_data in self.known_embeddings.items():
+        keys = []
+        names = []
+        rows = []
+        for hash_key, user_data in known_embeddings.items():
             # Extract embedding and name from stored data
             if isinstance(user_data, dict):
                 db_emb = user_data.get('emb')
@@ -103,32 +96,204 @@ class FaceRecognizer:
                 # Legacy format support
                 db_emb = user_data
                 name = hash_key
-            
+
             # Support both single embedding and averaged lists
             if isinstance(db_emb, list):
                 db_emb = torch.stack(db_emb).mean(dim=0)
-                
-            dist = (embedding - db_emb).norm().item()
-            if dist < min_dist:
-                min_dist = dist
-                identity = name
-        
+
+            rows.append(db_emb.detach().reshape(-1).float().cpu().numpy())
+            keys.append(hash_key)
+            names.append(name)
+
+        matrix = np.stack(rows) if rows else np.empty((0, 512), dtype=np.float32)
+        self.store.write(keys, names, matrix)
+        os.replace(DB_PATH, DB_PATH + '.migrated')
+        print(f"Migrated {len(keys)} users from {DB_PATH} to {DB_MATRIX_PATH}.")
+
+    def sync_ann_index(self):
+        """
+        Loads (or trains) the IVF index when ANN_ENABLED and the gallery is large enough,
+        then inserts any gallery rows the persisted index has not seen yet. The index is
+        retrained if its fingerprint does not match the gallery rows it claims to cover.
+        """
+        if not ANN_ENABLED or len(self.gallery_names) < ANN_MIN_GALLERY:
+            self.ann_index = None
+            return
+
+        index = self.ann_index
+        if index is None:
+            index = IVFIndex.load(ANN_INDEX_PATH)
+
+        if index is None or index.ntotal > len(self.gallery_names) \
+                or index.fingerprint != gallery_fingerprint(self.gallery_keys[:index.ntotal]):
+            # Missing, or built for a different database: retrain from scratch
+            print(f"Training ANN index on {len(self.gallery_names)} users...")
+            index = IVFIndex()
+            index.train(self.gallery)
+
+        if index.ntotal < len(self.gallery_names):
+            start = index.ntotal
+            index.add(self.gallery[start:])
+            index.fingerprint = gallery_fingerprint(self.gallery_keys)
+            index.save(ANN_INDEX_PATH, start)  # Appends only the new rows
+        self.ann_index = index
+
+    def sync_compressed_gallery(self):
+        """
+        Loads (or builds) the float16 / int8 copy of the gallery when GALLERY_DTYPE asks
+        for one, then encodes any rows the persisted copy has not seen yet. The copy is
+        rebuilt if its fingerprint does not match the gallery rows it claims to cover.
+        """
+        if GALLERY_DTYPE == 'float32' or len(self.gallery_names) == 0:
+            self.compressed = None
+            return
+
+        compressed = self.compressed
+        if compressed is None:
+            compressed = CompressedGallery.load(GALLERY_COMPRESSED_PATH, GALLERY_DTYPE)
+        if compressed is None or compressed.ntotal > len(self.gallery_names) \
+                or compressed.fingerprint != gallery_fingerprint(self.gallery_keys[:compressed.ntotal]):
+            # Missing, or encoded from a different database: rebuild from scratch
+            print(f"Encoding {len(self.gallery_names)} users as {GALLERY_DTYPE}...")
+            compressed = CompressedGallery(GALLERY_DTYPE)
+
+        if compressed.ntotal < len(self.gallery_names):
+            start = compressed.ntotal
+            compressed.add(self.gallery[start:])
+            compressed.fingerprint = gallery_fingerprint(self.gallery_keys)
+            compressed.save(GALLERY_COMPRESSED_PATH, start)  # Appends only the new rows
+        self.compressed = compressed
+
+    def align_face(self, frame, face_data):
+        """
+        Aligns and crops one face. Returns a 160x160 BGR uint8 image, or None.
+        """
+        return align_face(frame, face_data)
+
+    def embed_crops(self, crops):
+        """
+        Standardizes aligned 160x160 crops and runs ONE batched forward pass.
+        Returns a (len(crops), 512) tensor on CPU.
+        """
+        batch = np.stack(crops).astype(np.float32)
+        batch = (batch - 127.5) / 128.0
+        face_tensor = torch.from_numpy(batch).permute(0, 3, 1, 2).contiguous()
+        return self.infer(face_tensor)
+
+    def get_embedding(self, frame, face_data):
+        """
+        Aligns face, crops, standardizes, and returns embedding.
+        """
+        return self.get_embeddings(frame, [face_data])[0]
+
+    def get_embeddings(self, frame, faces, embed=None):
+        """
+        Batched form of get_embedding() for every face in one frame.
+        Returns a list parallel to `faces` of (1, 512) embeddings (None where alignment failed).
+        `embed` replaces embed_crops() for the forward pass (e.g. a shared EmbeddingBatcher).
+        """
+        crops = [self.align_face(frame, face_data) for face_data in faces]
+        results = [None] * len(faces)
+
+        # Near-duplicate crops seen recently skip inference
+        fingerprints = {}
+        valid = []
+        for i, crop in enumerate(crops):
+            if crop is None:
+                continue
+            if self.embedding_cache is not None:
+                cached, fingerprints[i] = self.embedding_cache.get(crop, faces[i]['facial_area'])
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            valid.append(i)
+
+        if not valid:
+            return results
+
+        embs = (embed or self.embed_crops)([crops[i] for i in valid])
+        for row, i in enumerate(valid):
+            results[i] = embs[row:row + 1].clone()
+            if self.embedding_cache is not None:
+                self.embedding_cache.put(fingerprints[i], faces[i]['facial_area'], results[i])
+        return results
+
+    def identify(self, embedding):
+        names, dists = self.search(embedding, k=1)
+        if not names:
+            return "Unknown", 100
+
+        identity, min_dist = names[0], dists[0]
         if min_dist > RECOGNITION_THRESHOLD:
             return "Unknown", min_dist
         
         return identity, min_dist
 
+    def identify_batch(self, embeddings):
+        """
+        Batched form of identify(). Returns a list of (name, distance) per embedding.
+        """
+        if len(embeddings) == 0:
+            return []
+        if len(self.gallery_names) == 0:
+            return [("Unknown", 100)] * len(embeddings)
+
+        queries = torch.cat([emb.reshape(1, -1) for emb in embeddings]).float()
+        if self.ann_index is not None:
+            return [self.identify(q) for q in queries]
+
+        if self.compressed is not None:
+            top_idx, top_dists = self.compressed.search(queries, self.gallery, k=1)
+            min_dists, min_idx = top_dists[:, 0], top_idx[:, 0]
+        else:
+            min_dists, min_idx = torch.cdist(queries, self.gallery).min(dim=1)
+        results = []
+        for dist, idx in zip(min_dists.tolist(), min_idx.tolist()):
+            if dist > RECOGNITION_THRESHOLD:
+                results.append(("Unknown", dist))
+            else:
+                results.append((self.gallery_names[idx], dist))
+        return results
+
+    def search(self, embedding, k=1):
+        """
+        Returns the k nearest users as (names, distances), closest first.
+        One batched distance computation against the gallery matrix,
+        an IVF probe when the ANN index is active, or a float16 / int8 pass
+        with float32 re-ranking when the compressed gallery is active.
+        """
+        if len(self.gallery_names) == 0:
+            return [], []
+
+        query = embedding.reshape(1, -1).float()
+        if self.ann_index is not None:
+            top_idx, top_dists = self.ann_index.search(query, self.gallery, k)
+            names = [self.gallery_names[i] for i in top_idx.tolist()]
+            return names, top_dists.tolist()
+
+        if self.compressed is not None:
+            top_idx, top_dists = self.compressed.search(query, self.gallery, k)
+            names = [self.gallery_names[i] for i in top_idx[0].tolist()]
+            return names, top_dists[0].tolist()
+
+        dists = torch.cdist(query, self.gallery).squeeze(0)
+
+        k = min(k, len(self.gallery_names))
+        top_dists, top_idx = torch.topk(dists, k, largest=False)
+        names = [self.gallery_names[i] for i in top_idx.tolist()]
+        return names, top_dists.tolist()
+
     def register_face(self, name, samples):
         """
         Saves the MEAN (Average) of the collected samples.
         PREVENTS overwriting if user already exists.
-        Stores as: hash(name) -> {'name': name, 'emb': mean_embedding}
+        Appends one row to the store: hash(name), name, mean_embedding
         """
         if not samples: 
             return False
 
         # Check if name already exists BEFORE capturing
-        if name_exists(self.known_embeddings, name):
+        if self.check_name_exists(name):
             print(f"\n[ERROR] Registration Failed: User '{name}' already exists in the database!")
             print("[HINT] Please use a different name.\n")
             return False
@@ -143,22 +308,48 @@ class FaceRecognizer:
             # Generate hash of name as key
             name_hash = hash_name(name)
             
-            # Save to dictionary with hash key and name + embedding in value
-            self.known_embeddings[name_hash] = {
-                'name': name,
-                'emb': mean_embedding
-            }
-            
-            # Save to disk
-            self.save_db()
+            # Append to disk (no rewrite), then re-map the grown matrix
+            self.store.append([name_hash], [name], mean_embedding.detach().float().cpu().numpy())
+            print("Database saved.")
+            self.map_gallery()
+            self.sync_ann_index()
+            self.sync_compressed_gallery()
             return True
             
         except Exception as e:
             print(f"Registration Error: {e}")
             return False
 
+    def register_faces(self, names, mean_embeddings):
+        """
+        Bulk form of register_face(): one (1, 512) mean embedding per name, committed
+        to the store in ONE append. Names already registered (or repeated) are skipped.
+        Returns the list of names actually registered.
+        """
+        keys, new_names, rows = [], [], []
+        for name, emb in zip(names, mean_embeddings):
+            if self.check_name_exists(name) or name in new_names:
+                print(f"[SKIP] User '{name}' already exists in the database.")
+                continue
+            keys.append(hash_name(name))
+            new_names.append(name)
+            rows.append(emb.detach().reshape(-1).float().cpu().numpy())
+
+        if not rows:
+            return []
+        try:
+            self.store.append(keys, new_names, np.stack(rows))
+        except Exception as e:
+            print(f"Registration Error: {e}")
+            return []
+        print(f"Database saved ({len(new_names)} users added).")
+        self.map_gallery()
+        self.sync_ann_index()
+        self.sync_compressed_gallery()
+        return new_names
+
     def check_name_exists(self, name):
         """
         Public method to check if a name exists before starting capture.
         """
-        return name_exists(self.known_embeddings, name)
\ No newline at end of file
+        return name in self.name_set
\ No newline at end of file
@@ -0,0 +1,203 @@
+# src/reports.py
+import json
+import os
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from core.config import ATTENDANCE_BACKEND, CSV_COLUMNS, LOG_PATH, REPORT_DAILY_PATH, REPORT_STATE_PATH
+from core.config import WORK_START_TIME, LATE_GRACE_MINUTES
+
+DAILY_COLUMNS = ['Name', 'Date', 'Punch In Time', 'Punch Out Time', 'Hours', 'Late', 'Missing Punch Out']
+ROLLUP_COLUMNS = ['Name', 'Date', 'Punch In Time', 'Punch Out Time', 'Hours', 'Late', 'Open']  # As persisted
+PERIODS = ('day', 'week', 'month')
+
+def open_store():
+    """The configured attendance store, opened read-side (no AttendanceManager, no writer thread)."""
+    if ATTENDANCE_BACKEND == 'sqlite':
+        from src.sqlite_store import SQLiteAttendanceStore
+        return SQLiteAttendanceStore()
+    from src.journal import PunchJournal
+    return PunchJournal()
+
+EVENT_COLUMNS = ['Time', 'Name', 'Action']
+
+def table_events(rows):
+    """
+    (time, name, action) events from Name/Date/Punch In/Punch Out table rows, for logs
+    that only have the table: each row is one IN and/or OUT, its day's only pair.
+    """
+    events = []
+    for name, day, punch_in, punch_out in rows:
+        for value, action in ((punch_in, 'PUNCH IN'), (punch_out, 'PUNCH OUT')):
+            if value:
+                events.append((datetime.strptime(f"{day} {value}", '%Y-%m-%d %H:%M:%S'), name, action))
+    return events
+
+def load_table_events():
+    """Events from the CSV table at LOG_PATH, for a log written before the journal existed."""
+    if not os.path.exists(LOG_PATH):
+        return []
+    table = pd.read_csv(LOG_PATH, dtype=str, keep_default_na=False)
+    return table_events(table[CSV_COLUMNS].values.tolist())
+
+def daily_rollup(events):
+    """
+    Per-(Name, Date) hours, late arrival and open state from punch events, vectorized.
+    Each IN is paired with the next event of the same day when that is an OUT, and Hours
+    is the sum of those pairs. Late compares the day's first IN with WORK_START_TIME.
+    A day is open when there is no OUT after its latest IN.
+    """
+    df = pd.DataFrame(events, columns=EVENT_COLUMNS)
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+    df['Time'] = pd.to_datetime(df['Time'])
+    df = df.sort_values(['Name', 'Time'], kind='stable', ignore_index=True)
+    df['Date'] = df['Time'].dt.strftime('%Y-%m-%d')
+    is_in = (df['Action'] == 'PUNCH IN').to_numpy()
+
+    by_day = df.groupby(['Name', 'Date'], sort=False)
+    next_action = by_day['Action'].shift(-1)
+    next_time = by_day['Time'].shift(-1)
+    paired = is_in & (next_action == 'PUNCH OUT').to_numpy()
+    pair_hours = (next_time - df['Time']).dt.total_seconds().to_numpy() / 3600.0
+
+    df['In'] = df['Time'].where(is_in)
+    df['Out'] = df['Time'].where(~is_in)
+    df['Pair Hours'] = np.where(paired, pair_hours, 0.0)
+    df['Paired'] = paired
+    daily = df.groupby(['Name', 'Date'], sort=False).agg(
+        first_in=('In', 'min'), last_out=('Out', 'max'), hours=('Pair Hours', 'sum'),
+        pairs=('Paired', 'any'), last_action=('Action', 'last'),
+    ).reset_index().sort_values(['Date', 'Name'], kind='stable', ignore_index=True)
+
+    late_after = pd.to_datetime(daily['Date'] + ' ' + WORK_START_TIME, format='%Y-%m-%d %H:%M:%S') \
+        + pd.Timedelta(minutes=LATE_GRACE_MINUTES)
+    daily['Punch In Time'] = daily['first_in'].dt.strftime('%H:%M:%S').fillna('')
+    daily['Punch Out Time'] = daily['last_out'].dt.strftime('%H:%M:%S').fillna('')
+    daily['Hours'] = np.where(daily['pairs'], daily['hours'].round(2), np.nan)
+    daily['Late'] = (daily['first_in'] > late_after).to_numpy()
+    daily['Open'] = (daily['last_action'] == 'PUNCH IN').to_numpy()
+    return daily[ROLLUP_COLUMNS]
+
+def with_missing(daily, today):
+    """DAILY_COLUMNS view of rollups: an open day before `today` (YYYY-MM-DD) is missing its punch-out."""
+    daily = daily.assign(**{'Missing Punch Out': daily['Open'].astype(bool) & (daily['Date'] < today)})
+    return daily[DAILY_COLUMNS].reset_index(drop=True)
+
+def load_daily(path=REPORT_DAILY_PATH):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    daily = pd.read_csv(path, dtype={'Name': str, 'Date': str, 'Punch In Time': str, 'Punch Out Time': str})
+    daily[['Punch In Time', 'Punch Out Time']] = daily[['Punch In Time', 'Punch Out Time']].fillna('')
+    daily[['Late', 'Open']] = daily[['Late', 'Open']].astype(bool)
+    return daily[ROLLUP_COLUMNS]
+
+def load_state(path=REPORT_STATE_PATH):
+    """
+    Where the persisted rollups stopped reading the store: {'backend', 'cursor', 'day_starts'},
+    day_starts mapping each date to the store position of its first punch. None if unusable.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('backend') != ATTENDANCE_BACKEND:
+            return None
+        return {'backend': state['backend'], 'cursor': int(state['cursor']), 'day_starts': dict(state['day_starts'])}
+    except Exception as e:
+        print(f"Ignoring unreadable report state: {e}")
+        return None
+
+def save_daily(daily, state, path=REPORT_DAILY_PATH, state_path=REPORT_STATE_PATH):
+    """Writes the rollups, then the state they reflect. Both atomically."""
+    tmp_path = path + '.tmp'
+    daily.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def update_daily(path=REPORT_DAILY_PATH, today=None, rebuild=False, state_path=REPORT_STATE_PATH):
+    """
+    Brings the persisted rollups up to date and returns every day's rollup.
+    Only punches written since the last run are read, then every (Name, Date) they
+    touch is recomputed from the first punch of its day on, so backfilled days
+    (e.g. from --mode process) are picked up. `today` (date, default today) only
+    decides which open days count as missing a punch-out.
+    `rebuild` recomputes everything from the whole store.
+    """
+    today = (today or date.today()).isoformat()
+    store = open_store()
+    try:
+        if not store.exists():
+            return with_missing(daily_rollup(load_table_events()), today)
+
+        state = None if rebuild else load_state(state_path)
+        daily = load_daily(path) if state is not None else pd.DataFrame(columns=ROLLUP_COLUMNS)
+        state = state or {'backend': ATTENDANCE_BACKEND, 'cursor': 0, 'day_starts': {}}
+        read = store.punches_since(state['cursor'])
+        if read is None:
+            print("Attendance store was replaced since the last report. Rebuilding daily rollups...")
+            daily = pd.DataFrame(columns=ROLLUP_COLUMNS)
+            state = {'backend': ATTENDANCE_BACKEND, 'cursor': 0, 'day_starts': {}}
+            read = store.punches_since(0)
+        new, cursor = read
+        if not new:
+            return with_missing(daily, today)
+
+        day_starts = state['day_starts']
+        touched = set()
+        for position, time, name, _ in new:
+            day = time.strftime('%Y-%m-%d')
+            touched.add((name, day))
+            day_starts[day] = min(day_starts.get(day, position), position)
+
+        # Touched days may have punches from before the cursor: read from the first one
+        start = min(day_starts[day] for _, day in touched)
+        events = new if start >= state['cursor'] else store.punches_since(start)[0]
+        events = [(time, name, action) for position, time, name, action in events
+                  if position < cursor and (name, time.strftime('%Y-%m-%d')) in touched]
+
+        keys = daily['Name'] + '\n' + daily['Date']
+        kept = daily[~keys.isin({f"{name}\n{day}" for name, day in touched})]
+        frames = [frame for frame in (kept, daily_rollup(events)) if not frame.empty]
+        daily = pd.concat(frames, ignore_index=True).sort_values(['Date', 'Name'], kind='stable', ignore_index=True)
+        state['cursor'] = cursor
+        save_daily(daily, state, path, state_path)
+        print(f"Rolled up {len(touched)} person-day(s) into {path}")
+    finally:
+        store.close()
+    return with_missing(daily, today)
+
+def period_totals(daily, period='day'):
+    """Per person and day / week (starting Monday) / month: days present, hours, late arrivals, missing punch-outs."""
+    if daily.empty:
+        return pd.DataFrame(columns=['Name', 'Period', 'Days', 'Hours', 'Late Arrivals', 'Missing Punch Outs'])
+    dates = pd.to_datetime(daily['Date'], format='%Y-%m-%d')
+    if period == 'week':
+        key = (dates - pd.to_timedelta(dates.dt.weekday, unit='D')).dt.strftime('%Y-%m-%d')
+    elif period == 'month':
+        key = dates.dt.strftime('%Y-%m')
+    else:
+        key = daily['Date']
+    totals = daily.assign(Period=key).groupby(['Name', 'Period'], sort=True).agg(
+        Days=('Date', 'nunique'),
+        Hours=('Hours', 'sum'),
+        **{'Late Arrivals': ('Late', 'sum'), 'Missing Punch Outs': ('Missing Punch Out', 'sum')},
+    ).reset_index()
+    totals['Hours'] = totals['Hours'].round(2)
+    return totals
+
+def build_report(period='day', start_date=None, end_date=None, name=None, rebuild=False):
+    """Updates the rollups, then totals the requested slice."""
+    daily = update_daily(rebuild=rebuild)
+    if start_date is not None:
+        daily = daily[daily['Date'] >= str(start_date)]
+    if end_date is not None:
+        daily = daily[daily['Date'] <= str(end_date)]
+    if name is not None:
+        daily = daily[daily['Name'] == name]
+    return period_totals(daily, period)
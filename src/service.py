@@ -0,0 +1,138 @@
+# src/service.py
+import threading
+import time
+from datetime import datetime
+import cv2
+from core.config import LIVENESS_ENABLED
+from src.batcher import EmbeddingBatcher
+from src.liveness import LivenessEngine
+from src.metrics import metrics
+from src.pipeline import detect_faces, recognize_faces, draw_results
+from src.tracker import FaceTracker
+
+def open_source(source):
+    """Device index ('0', '1', ...) or any path / URL cv2.VideoCapture accepts (files, RTSP)."""
+    return cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+
+class CameraStream:
+    """
+    One entrance: its own capture, detector view (ROI), tracker and intent checks.
+    Detection goes through the shared RetinaFace; embeddings through the shared batcher.
+    """
+
+    def __init__(self, source, detector, recognizer, manager, batcher, state_lock):
+        self.source = source
+        self.name = str(source)
+        self.detector = detector
+        self.recognizer = recognizer
+        self.manager = manager
+        self.batcher = batcher
+        self.state_lock = state_lock  # Shared: one AttendanceManager for every stream
+        self.tracker = FaceTracker()
+        self.liveness = LivenessEngine() if LIVENESS_ENABLED else None  # Keyed by this stream's track ids
+        self.cap = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.latest_lock = threading.Lock()
+        self.latest = (None, [])  # (frame, results)
+        self.frames = 0
+        self.punches = 0
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        self.cap = open_source(self.source)
+        if not self.cap.isOpened():
+            print(f"[{self.name}] Cannot open source.")
+            return False
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()  # No timeout: a late punch must not reach a closed manager
+        if self.cap is not None:
+            self.cap.release()
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                print(f"[{self.name}] Source ended.")
+                break
+            now = datetime.now()
+            items = detect_faces(self.detector, self.tracker, frame, self.state_lock, now, self.liveness)
+            results = recognize_faces(self.recognizer, self.manager, frame, items, self.state_lock, now,
+                                      embed=self.batcher.embed_crops)
+            metrics.tick('process')
+            self.frames += 1
+            for result in results:
+                if result['status'] == "Success":
+                    self.punches += 1
+                    print(f"[{self.name}] {result['name']}: {result['action']} at {now.strftime('%H:%M:%S')}")
+            with self.latest_lock:
+                self.latest = (frame, results)
+
+class AttendanceService:
+    """
+    Several camera streams in one process: one RetinaFace network (calls serialized),
+    one FaceNet behind an EmbeddingBatcher that batches crops across streams,
+    and one AttendanceManager.
+    """
+
+    def __init__(self, sources, detector, recognizer, manager, batcher=None):
+        self.batcher = batcher or EmbeddingBatcher(recognizer)
+        self.state_lock = threading.Lock()
+        self.streams = [CameraStream(source, detector.share(), recognizer, manager, self.batcher, self.state_lock)
+                        for source in sources]
+
+    @property
+    def running(self):
+        return any(stream.running for stream in self.streams)
+
+    def start(self):
+        self.batcher.start()
+        started = [stream.start() for stream in self.streams]
+        return any(started)
+
+    def stop(self):
+        for stream in self.streams:
+            stream.stop()
+        self.batcher.stop()
+
+    def show(self):
+        """Renders each stream's newest frame in its own window (caller's thread)."""
+        for stream in self.streams:
+            with stream.latest_lock:
+                frame, results = stream.latest
+            if frame is None:
+                continue
+            frame = frame.copy()
+            stream.detector.draw_roi(frame)
+            draw_results(frame, results)
+            cv2.imshow(f"Face Attendance - {stream.name}", frame)
+
+    def run(self, display=False):
+        """Blocks until every source ends, or 'q' / Ctrl+C."""
+        if not self.start():
+            self.stop()
+            return
+        try:
+            while self.running:
+                if display:
+                    self.show()
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+                else:
+                    time.sleep(0.1)
+                metrics.maybe_dump()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+        for stream in self.streams:
+            print(f"[{stream.name}] {stream.frames} frames, {stream.punches} punches")
@@ -0,0 +1,180 @@
+# src/sqlite_store.py
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from core.config import ATTENDANCE_DB_PATH, JOURNAL_FSYNC, LOG_PATH, CSV_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendance (
+    id        INTEGER PRIMARY KEY,
+    name      TEXT NOT NULL,   -- Name
+    date      TEXT NOT NULL,   -- Date (YYYY-MM-DD)
+    punch_in  TEXT,            -- Punch In Time (HH:MM:SS)
+    punch_out TEXT,            -- Punch Out Time (HH:MM:SS)
+    UNIQUE (name, date)        -- Also the (name, date) index used by every punch
+);
+CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date);
+CREATE TABLE IF NOT EXISTS punches (
+    id     INTEGER PRIMARY KEY, -- Write order; reports resume from the last id they read
+    ts     TEXT NOT NULL,      -- Timestamp (YYYY-MM-DDTHH:MM:SS), as in the journal
+    name   TEXT NOT NULL,
+    action TEXT NOT NULL       -- 'PUNCH IN' / 'PUNCH OUT'
+);
+CREATE TABLE IF NOT EXISTS user_state (
+    name  TEXT PRIMARY KEY,
+    state TEXT NOT NULL        -- 'IN' / 'OUT' after the user's latest punch
+);
+"""
+
+class SQLiteAttendanceStore:
+    """
+    Attendance table in SQLite (WAL mode). A punch is one indexed upsert on (name, date)
+    plus one on user_state, so recovery reads one row per user instead of replaying history.
+    Every punch is also kept in `punches` for reports that need all of a day's events.
+    Same write interface as PunchJournal, so PunchWriter can drive either.
+    """
+
+    def __init__(self, path=ATTENDANCE_DB_PATH, fsync=JOURNAL_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()  # One connection, shared by the camera loop and the writer thread
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self.conn.executescript(SCHEMA)
+        self._seed_punches()
+
+    def _seed_punches(self):
+        """
+        Databases created before the punches table only have the (name, date) table:
+        its latest IN / OUT of each day become that day's events, once.
+        """
+        with self.conn:
+            if self.conn.execute("SELECT 1 FROM punches LIMIT 1").fetchone() is not None:
+                return
+            self.conn.execute(
+                "INSERT INTO punches (ts, name, action) SELECT ts, name, action FROM ("
+                "SELECT id, date || 'T' || punch_in AS ts, name, 'PUNCH IN' AS action FROM attendance WHERE punch_in IS NOT NULL "
+                "UNION ALL "
+                "SELECT id, date || 'T' || punch_out, name, 'PUNCH OUT' FROM attendance WHERE punch_out IS NOT NULL"
+                ") ORDER BY ts, id")
+
+    def exists(self):
+        """True once the store holds any attendance."""
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM attendance LIMIT 1").fetchone() is not None
+
+    def append(self, name, time, action):
+        self.append_many([(name, time, action)])
+
+    def append_many(self, events, fsync=None):
+        """
+        Applies (name, time, action) events in one transaction. Same rule as the
+        CSV table: one row per (name, date), the latest IN / OUT of the day wins.
+        Every event is also appended to `punches`.
+        `fsync` overrides the synchronous level for this write.
+        """
+        punch_in, punch_out, state, punches = [], [], [], []
+        for name, time, action in events:
+            row = (name, time.strftime('%Y-%m-%d'), time.strftime('%H:%M:%S'))
+            (punch_in if action == "PUNCH IN" else punch_out).append(row)
+            state.append((name, "IN" if action == "PUNCH IN" else "OUT"))
+            punches.append((time.isoformat(timespec='seconds'), name, action))
+
+        with self.lock:
+            if fsync is not None and fsync != self.fsync:
+                self.conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO attendance (name, date, punch_in) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, date) DO UPDATE SET punch_in = excluded.punch_in", punch_in)
+                self.conn.executemany(
+                    "INSERT INTO attendance (name, date, punch_out) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, date) DO UPDATE SET punch_out = excluded.punch_out", punch_out)
+                self.conn.executemany(
+                    "INSERT INTO user_state (name, state) VALUES (?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET state = excluded.state", state)
+                self.conn.executemany("INSERT INTO punches (ts, name, action) VALUES (?, ?, ?)", punches)
+            if fsync is not None and fsync != self.fsync:
+                self.conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+
+    def load_state(self):
+        """{name: 'IN' / 'OUT'} for every user."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT name, state FROM user_state"))
+
+    def records(self, start_date=None, end_date=None, name=None):
+        """
+        Rows (as CSV_COLUMNS lists) with start_date <= Date <= end_date ('YYYY-MM-DD',
+        either bound optional), optionally for one name. Served from the indexes.
+        """
+        clauses, params = [], []
+        if name is not None:
+            clauses.append("name = ?")
+            params.append(name)
+        if start_date is not None:
+            clauses.append("date >= ?")
+            params.append(str(start_date))
+        if end_date is not None:
+            clauses.append("date <= ?")
+            params.append(str(end_date))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT name, date, punch_in, punch_out FROM attendance {where} ORDER BY date, id", params)
+            return [[n, d, i or '', o or ''] for n, d, i, o in rows]
+
+    def punches_since(self, position=0):
+        """
+        (events, next_position) for every punch with id >= `position`, as
+        (id, timestamp, name, action) in write order. Resume from next_position.
+        Returns None if `position` is past the end (database replaced).
+        """
+        with self.lock:
+            last = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM punches").fetchone()[0]
+            if position > last + 1:
+                return None
+            rows = self.conn.execute(
+                "SELECT id, ts, name, action FROM punches WHERE id >= ? ORDER BY id", (position,)).fetchall()
+        events = [(i, datetime.fromisoformat(ts), n, a) for i, ts, n, a in rows]
+        return events, (events[-1][0] + 1 if events else position)
+
+    def import_events(self, events):
+        """Seeds the store from (time, name, action) events, e.g. PunchJournal.replay()."""
+        batch = [(name, time, action) for time, name, action in events]
+        self.append_many(batch)
+        return len(batch)
+
+    def import_table(self, csv_path=LOG_PATH):
+        """
+        Seeds the store from a Name/Date/Punch In/Punch Out table (one IN and/or OUT
+        per row, in file order). Returns the number of events applied.
+        """
+        events = []
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                for column, action in (('Punch In Time', 'PUNCH IN'), ('Punch Out Time', 'PUNCH OUT')):
+                    value = (row.get(column) or '').strip()
+                    if value:
+                        time = datetime.strptime(f"{row['Date']} {value}", '%Y-%m-%d %H:%M:%S')
+                        events.append((row['Name'], time, action))
+        self.append_many(events)
+        return len(events)
+
+    def materialize(self, csv_path=LOG_PATH):
+        """Exports the table as CSV_COLUMNS CSV. Written atomically."""
+        rows = self.records()
+        tmp_path = csv_path + '.tmp'
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(rows)
+        os.replace(tmp_path, csv_path)
+        return len(rows)
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,117 @@
+# src/tracker.py
+import itertools
+from core.config import DETECT_EVERY_N_FRAMES, TRACK_IOU_THRESHOLD, TRACK_MAX_MISSED, REVERIFY_SECONDS
+
+def box_iou(a, b):
+    """Intersection-over-union of two [x1, y1, x2, y2] boxes."""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+class Track:
+    """
+    One face followed across frames, with its cached recognition result.
+    """
+
+    def __init__(self, track_id, face_data):
+        self.id = track_id
+        self.face_data = face_data  # Latest RetinaFace entry (box, landmarks, score)
+        self.missed = 0             # Consecutive detection rounds without a match
+        self.fresh = True           # face_data comes from the current frame
+        self.name = None            # Cached identity ("Unknown" included)
+        self.dist = None
+        self.verified_at = None     # time.time() of the last recognition
+        self.live = None            # Liveness result (None = not checked)
+        self.liveness_msg = ""      # Current challenge prompt
+
+    @property
+    def box(self):
+        return self.face_data['facial_area']
+
+    def needs_recognition(self, now):
+        """
+        Recognize only on frames with a fresh detection, and only when the identity
+        is missing, Unknown (retry), or due for periodic re-verification.
+        """
+        if not self.fresh:
+            return False
+        if self.name is None or self.name == "Unknown":
+            return True
+        return (now - self.verified_at) >= REVERIFY_SECONDS
+
+    def set_identity(self, name, dist, now):
+        self.name = name
+        self.dist = dist
+        self.verified_at = now
+
+class FaceTracker:
+    """
+    IoU tracker so RetinaFace runs every DETECT_EVERY_N_FRAMES frames (or whenever
+    no track is alive) and FaceNet runs once per track plus periodic re-verification.
+    """
+
+    def __init__(self, detect_every=DETECT_EVERY_N_FRAMES, iou_threshold=TRACK_IOU_THRESHOLD,
+                 max_missed=TRACK_MAX_MISSED):
+        self.detect_every = max(1, detect_every)
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = {}  # {track_id: Track}
+        self.frame_count = 0
+        self._ids = itertools.count(1)
+
+    def start_frame(self):
+        """
+        Advances the frame counter. Returns True if this frame needs a full detection pass.
+        """
+        for track in self.tracks.values():
+            track.fresh = False
+        detect = not self.tracks or self.frame_count % self.detect_every == 0
+        self.frame_count += 1
+        return detect
+
+    def update(self, faces):
+        """
+        Greedy IoU matching of fresh RetinaFace detections to existing tracks.
+        Unmatched detections start new tracks; tracks unmatched for more than
+        max_missed rounds are dropped.
+        """
+        detections = list(faces.values()) if isinstance(faces, dict) else []
+
+        pairs = []
+        for track_id, track in self.tracks.items():
+            for d, face_data in enumerate(detections):
+                iou = box_iou(track.box, face_data['facial_area'])
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, track_id, d))
+        pairs.sort(reverse=True)
+
+        matched_tracks, matched_dets = set(), set()
+        for _, track_id, d in pairs:
+            if track_id in matched_tracks or d in matched_dets:
+                continue
+            track = self.tracks[track_id]
+            track.face_data = detections[d]
+            track.missed = 0
+            track.fresh = True
+            matched_tracks.add(track_id)
+            matched_dets.add(d)
+
+        for track_id in list(self.tracks):
+            if track_id not in matched_tracks:
+                self.tracks[track_id].missed += 1
+                if self.tracks[track_id].missed > self.max_missed:
+                    del self.tracks[track_id]
+
+        for d, face_data in enumerate(detections):
+            if d not in matched_dets:
+                track = Track(next(self._ids), face_data)
+                self.tracks[track.id] = track
+
+    def active(self):
+        """Tracks currently in view (matched at the last detection round)."""
+        return [track for track in self.tracks.values() if track.missed == 0]